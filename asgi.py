@@ -0,0 +1,5 @@
+from book_library_api.asgi import create_asgi_app
+
+
+# asgi server entry point, e.g. uvicorn asgi:application --workers 4
+application = create_asgi_app('production')
@@ -0,0 +1,57 @@
+"""Micro-benchmark of list response serialization.
+
+Compares the previous path (new BooksSchema per request, json module encoder) with a cached schema
+and orjson encoder for 1, 100 and 1000 books.
+
+    python benchmarks/bench_json.py
+"""
+import os
+import sys
+import timeit
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+from flask import jsonify
+from flask.json import JSONEncoder
+
+from book_library_api import create_app
+from book_library_api.json_provider import get_json_encoder
+from book_library_api.models import Author, Book, BooksSchema
+from book_library_api.utils import get_schema
+
+
+def make_books(count: int) -> list:
+    author = Author(id=1, first_name='Adam', last_name='Mickiewicz', birth_date=date(1798, 12, 24))
+    return [Book(id=index, title=f'Book {index}', isbn=1000000000000 + index, number_of_pages=100 + index,
+                 description='Lorem ipsum dolor sit amet ' * 4, author_id=1, author=author)
+            for index in range(count)]
+
+
+def current_path(books: list):
+    return jsonify({'success': True, 'data': BooksSchema(many=True).dump(books)})
+
+
+def new_path(books: list):
+    return jsonify({'success': True, 'data': get_schema(BooksSchema, many=True).dump(books)})
+
+
+def run() -> None:
+    app = create_app('testing')
+    app.config['DEBUG'] = False
+    with app.test_request_context():
+        for count in (1, 100, 1000):
+            books = make_books(count)
+            number = max(10, 10000 // count)
+            app.json_encoder = JSONEncoder
+            before = timeit.timeit(lambda: current_path(books), number=number) / number
+            app.json_encoder = get_json_encoder('orjson')
+            after = timeit.timeit(lambda: new_path(books), number=number) / number
+            print(f'{count:>5} books: current {before * 1e3:8.3f} ms, new {after * 1e3:8.3f} ms, '
+                  f'speedup {before / after:5.2f}x')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,49 @@
+"""Micro-benchmark of authenticated request overhead (token_required decorator).
+
+Compares verification of every token (JWT_CACHE_SIZE = 0, behaviour before verified token cache)
+with cached verification.
+
+    python benchmarks/bench_token_required.py
+"""
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+from book_library_api import create_app, db
+from book_library_api.utils import token_required
+
+
+NUMBER = 20000
+
+
+def run(cache_size: int) -> None:
+    app = create_app('testing')
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['JWT_CACHE_SIZE'] = cache_size
+    app.extensions['token_cache'].max_size = cache_size
+
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    client.post('/api/v1/auth/register', json={'username': 'bench', 'email': 'bench@op.pl', 'password': '123456'})
+    token = client.post('/api/v1/auth/login', json={'username': 'bench', 'password': '123456'}).get_json()['token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    protected = token_required(lambda user_id: user_id)
+    with app.test_request_context(headers=headers):
+        decorator_time = timeit.timeit(protected, number=NUMBER) / NUMBER
+
+    request_time = timeit.timeit(lambda: client.get('/api/v1/auth/me', headers=headers), number=NUMBER // 10)
+    request_time /= NUMBER // 10
+
+    label = 'cached' if cache_size else 'no cache'
+    print(f'{label:>10}: token_required {decorator_time * 1e6:8.2f} us, GET /auth/me {request_time * 1e6:8.2f} us')
+
+
+if __name__ == '__main__':
+    run(cache_size=0)
+    run(cache_size=1024)
@@ -1,7 +1,15 @@
 from flask import Flask
 from config import config
-from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from book_library_api.cache import ResponseCache, LRUCacheBackend
+from book_library_api.advisor import IndexAdvisor
+from book_library_api.hashing import PasswordHasher
+from book_library_api.pool import InstrumentedQueuePool
+from book_library_api.json_provider import get_json_encoder
+from book_library_api.profiling import Profiler
+from book_library_api.ratelimit import RateLimiter
+from book_library_api.tasks import BackgroundTasks
+from book_library_api.routing import RoutingSQLAlchemy, ReplicaRouter
 
 
 # app = Flask(__name__)
@@ -17,27 +25,53 @@ from flask_migrate import Migrate
 
 # application factory prod dev test
 
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
 migrate = Migrate()
+response_cache = ResponseCache()
+index_advisor = IndexAdvisor()
+password_hasher = PasswordHasher()
+replica_router = ReplicaRouter()
+profiler = Profiler()
+rate_limiter = RateLimiter()
+background_tasks = BackgroundTasks()
 
 
 def create_app(config_name='development'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    if app.config.get('DB_POOL_METRICS'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+            'poolclass': InstrumentedQueuePool
+        }
+    app.json_encoder = get_json_encoder(app.config.get('JSON_PROVIDER', 'orjson'))
 
+    replica_router.init_app(app)
     db.init_app(app)
     migrate.init_app(app, db)
+    response_cache.init_app(app)
+    index_advisor.init_app(app, db)
+    password_hasher.init_app(app)
+    profiler.init_app(app)
+    rate_limiter.init_app(app)
+    background_tasks.init_app(app)
+    app.extensions['token_cache'] = LRUCacheBackend(app.config.get('JWT_CACHE_SIZE', 1024))
+    app.extensions['count_cache'] = LRUCacheBackend(app.config.get('COUNT_CACHE_SIZE', 1024))
 
     from book_library_api.commands import db_manage_bp
     from book_library_api.errors import errors_bp
     from book_library_api.authors import authors_bp
     from book_library_api.books import books_bp
     from book_library_api.auth import auth_bp
+    from book_library_api.admin import admin_bp
+    from book_library_api.stats import stats_bp
     app.register_blueprint(db_manage_bp)
     app.register_blueprint(errors_bp)
     app.register_blueprint(authors_bp, url_prefix='/api/v1')
     app.register_blueprint(books_bp, url_prefix='/api/v1')
     app.register_blueprint(auth_bp, url_prefix='/api/v1/auth')
+    app.register_blueprint(admin_bp, url_prefix='/api/v1/admin')
+    app.register_blueprint(stats_bp, url_prefix='/api/v1')
 
     return app
 
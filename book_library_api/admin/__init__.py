@@ -0,0 +1,6 @@
+from flask import Blueprint
+
+admin_bp = Blueprint('admin', __name__)
+
+
+from book_library_api.admin import admin
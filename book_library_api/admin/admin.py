@@ -0,0 +1,66 @@
+from flask import jsonify, request, Response, abort
+from book_library_api import db, response_cache, index_advisor, profiler, background_tasks
+from book_library_api.admin import admin_bp
+from book_library_api.pool import get_pool_stats
+from book_library_api.utils import admin_required, is_admin, token_required
+
+
+@admin_bp.route('/cache', methods=['GET'])
+@admin_required
+def get_cache_stats(user_id: int):
+    return jsonify({
+        'success': True,
+        'data': response_cache.stats()
+    })
+
+
+@admin_bp.route('/cache', methods=['DELETE'])
+@admin_required
+def clear_cache(user_id: int):
+    response_cache.invalidate()
+    return jsonify({
+        'success': True,
+        'data': 'Cache has been cleared'
+    })
+
+
+@admin_bp.route('/index-advisor', methods=['GET'])
+@admin_required
+def get_index_advisor_report(user_id: int):
+    return jsonify({
+        'success': True,
+        'data': index_advisor.report(db)
+    })
+
+
+@admin_bp.route('/pool', methods=['GET'])
+@admin_required
+def get_pool_metrics(user_id: int):
+    return jsonify({
+        'success': True,
+        'data': get_pool_stats(db.engine.pool)
+    })
+
+
+@admin_bp.route('/profiling', methods=['GET'])
+@admin_required
+def get_profiling_report(user_id: int):
+    if request.args.get('format') == 'prometheus':
+        return Response(profiler.prometheus_report(), mimetype='text/plain; version=0.0.4')
+    return jsonify({
+        'success': True,
+        'data': profiler.report()
+    })
+
+
+@admin_bp.route('/jobs/<job_id>', methods=['GET'])
+@token_required
+def get_job(user_id: int, job_id: str):
+    # status URL is returned to user who started the job, other users do not see it
+    job = background_tasks.get_status(job_id)
+    if job is None or (job['user_id'] != user_id and not is_admin(user_id)):
+        abort(404, f'Job with id {job_id} not found!')
+    return jsonify({
+        'success': True,
+        'data': job
+    })
@@ -0,0 +1,102 @@
+import time
+from collections import Counter
+from threading import Lock
+from typing import Optional
+
+from flask import Flask, current_app
+from flask_sqlalchemy import DefaultMeta
+from sqlalchemy import event
+
+
+class IndexAdvisor:
+    """Development tool - records which columns clients filter and sort on and which statements are slow,
+    so indexes can be added from evidence. Enabled by INDEX_ADVISOR config option.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask, db=None) -> None:
+        if not app.config.get('INDEX_ADVISOR', False):
+            return
+        state = {
+            'usage': Counter(),
+            'slow_queries': {},
+            'lock': Lock()
+        }
+        app.extensions['index_advisor'] = state
+        if db is not None:
+            with app.app_context():
+                engine = db.engine
+            self._listen(engine, state, app.config.get('INDEX_ADVISOR_SLOW_QUERY_MS', 100),
+                         app.config.get('INDEX_ADVISOR_MAX_QUERIES', 50))
+
+    @staticmethod
+    def _listen(engine, state: dict, slow_query_ms: float, max_queries: int) -> None:
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context._advisor_start_time = time.perf_counter()
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            duration_ms = (time.perf_counter() - context._advisor_start_time) * 1000
+            if duration_ms < slow_query_ms or executemany or statement.startswith('EXPLAIN'):
+                return
+            with state['lock']:
+                slow_query = state['slow_queries'].get(statement)
+                if slow_query is None:
+                    if len(state['slow_queries']) >= max_queries:
+                        return
+                    slow_query = state['slow_queries'][statement] = {'count': 0, 'max_duration_ms': 0}
+                slow_query['count'] += 1
+                slow_query['max_duration_ms'] = max(slow_query['max_duration_ms'], round(duration_ms, 2))
+                slow_query['parameters'] = parameters
+
+    @staticmethod
+    def record_usage(model: DefaultMeta, column_name: str, usage: str) -> None:
+        state = current_app.extensions.get('index_advisor')
+        if state is not None:
+            with state['lock']:
+                state['usage'][(model.__tablename__, column_name, usage)] += 1
+
+    @staticmethod
+    def _get_indexed_columns(table) -> set:
+        # only leading column of index can be used for filtering / sorting
+        indexed_columns = {index.columns[0].name for index in table.indexes if index.columns}
+        indexed_columns.update(column.name for column in table.primary_key.columns)
+        indexed_columns.update(column.name for column in table.columns if column.unique)
+        return indexed_columns
+
+    def report(self, db) -> dict:
+        state = current_app.extensions.get('index_advisor')
+        if state is None:
+            return {'enabled': False}
+
+        with state['lock']:
+            usage = dict(state['usage'])
+            slow_queries = {statement: dict(item) for statement, item in state['slow_queries'].items()}
+
+        columns = {}
+        for (table_name, column_name, kind), count in usage.items():
+            item = columns.setdefault((table_name, column_name), {
+                'table': table_name,
+                'column': column_name,
+                'filter': 0,
+                'sort': 0,
+                'indexed': column_name in self._get_indexed_columns(db.metadata.tables[table_name])
+            })
+            item[kind] += count
+
+        explain = 'EXPLAIN QUERY PLAN ' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+        queries = []
+        for statement, item in slow_queries.items():
+            # plan is taken now, not on hot path of slow request
+            rows = db.session.connection().exec_driver_sql(explain + statement, item.pop('parameters'))
+            queries.append({'statement': statement, **item, 'plan': [' '.join(map(str, row)) for row in rows]})
+
+        return {
+            'enabled': True,
+            'columns': sorted(columns.values(), key=lambda item: -(item['filter'] + item['sort'])),
+            'slow_queries': sorted(queries, key=lambda item: -item['max_duration_ms'])
+        }
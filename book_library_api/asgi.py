@@ -0,0 +1,9 @@
+from uvicorn.middleware.wsgi import WSGIMiddleware
+
+from book_library_api import create_app
+
+
+def create_asgi_app(config_name: str = 'development') -> WSGIMiddleware:
+    # application code runs on pool of ASGI_THREADS threads - size it with database pool
+    app = create_app(config_name)
+    return WSGIMiddleware(app, workers=app.config.get('ASGI_THREADS', 8))
@@ -4,22 +4,26 @@ from webargs.flaskparser import use_args
 from book_library_api import db
 from book_library_api.models import user_schema, User, UsersSchema, user_schema_update_password
 from book_library_api.auth import auth_bp
-from book_library_api.utils import validation_json_content_type, token_required
+from book_library_api.utils import validation_json_content_type, token_required, load_current_user
 
 
 @auth_bp.route('/register', methods=['POST'])
 @validation_json_content_type
 @use_args(user_schema, error_status_code=400)
 def register(args: dict):  # args data after validate
-    if User.query.filter(User.username == args['username']).first():
-        abort(409, f'Username {args["username"]} already exists!')
-    if User.query.filter(User.email == args['email']).first():
-        abort(409, f'Email {args["username"]} already exists!')
+    # cheap check first, duplicate sign-ups do not take password hashing slots
+    # concurrent ones are still rejected by the unique constraints, IntegrityError is turned into 409
+    taken = User.query.with_entities(User.username, User.email) \
+        .filter((User.username == args['username']) | (User.email == args['email'])).first()
+    if taken is not None:
+        column = 'username' if taken.username == args['username'] else 'email'
+        abort(409, f'{column.capitalize()} {args[column]} already exists!')
     args['password'] = User.generate_hashed_password(args['password'])
     user = User(**args)
     db.session.add(user)
-    db.session.commit()
+    db.session.flush()
     token = user.generate_jwt()
+    db.session.commit()
     return jsonify({
         'success': True,
         'token': token.decode()
@@ -35,6 +39,8 @@ def login(args: dict):  # args data after validate
         abort(401, f'Invalid credentials')
     if not user.is_password_valid(args['password']):
         abort(401, f'Invalid credentials')
+    if user.rehash_password_if_needed(args['password']):
+        db.session.commit()
     token = user.generate_jwt()
 
     return jsonify({
@@ -46,7 +52,7 @@ def login(args: dict):  # args data after validate
 @auth_bp.route('/me', methods=['GET'])
 @token_required
 def get_current_user(user_id: int):
-    user = User.query.get_or_404(user_id, description=f'User with id {user_id} not found!')
+    user = load_current_user(user_id)
 
     return jsonify({
         'success': True,
@@ -59,7 +65,7 @@ def get_current_user(user_id: int):
 @validation_json_content_type
 @use_args(user_schema_update_password, error_status_code=400)
 def update_password(user_id: int, args: dict):
-    user = User.query.get_or_404(user_id, description=f'User with id {user_id} not found!')
+    user = load_current_user(user_id)
 
     if not user.is_password_valid(args['current_password']):
         abort(401, description=f'Wrong current password')
@@ -78,17 +84,14 @@ def update_password(user_id: int, args: dict):
 @validation_json_content_type
 @use_args(UsersSchema(only=['username', 'email']), error_status_code=400)
 def update_user_data(user_id: int, args: dict):
-    if User.query.filter(User.username == args['username']).first():
-        abort(409, f'Username {args["username"]} already exists!')
-    if User.query.filter(User.email == args['email']).first():
-        abort(409, f'Email {args["username"]} already exists!')
-
-    user = User.query.get_or_404(user_id, description=f'User with id {user_id} not found!')
+    user = load_current_user(user_id)
     user.username = args['username']
     user.email = args['email']
+    db.session.flush()
+    data = user_schema.dump(user)
     db.session.commit()
 
     return jsonify({
         'success': True,
-        'data': user_schema.dump(user)
+        'data': data
     })
@@ -1,24 +1,32 @@
-from flask import jsonify, request
+from flask import jsonify, request, abort, current_app, url_for
 from webargs.flaskparser import use_args
 
-from book_library_api import db
-from book_library_api.models import Author, AuthorSchema, author_schema
+from book_library_api import db, response_cache, profiler, background_tasks
+from book_library_api.models import Author, AuthorSchema, author_schema, Book, AuthorBatchUpdateSchema, \
+    batch_delete_schema, TableVersion
 from book_library_api.utils import validation_json_content_type, get_schema_args, apply_order, apply_filter, \
-    get_pagination, token_required
+    get_schema, get_pagination, get_cursor_pagination, get_loader_options, token_required, \
+    read_only, conditional_get, conditional_get_resource, check_if_match, load_batch, check_batch_size, bulk_insert, \
+    bulk_update, bulk_delete, get_batch_response, delete_in_chunks
 from book_library_api.authors import authors_bp
 
 
 @authors_bp.route('/authors', methods=['GET'])
+@read_only
+@conditional_get
+@response_cache.cached
 def get_authors():
-    query = Author.query
-    # print(Author.query)
-    # print(authors)
     schema_args = get_schema_args(Author)
+    query = Author.query.options(*get_loader_options(Author, schema_args.get('only')))
     query = apply_order(Author, query)
     query = apply_filter(Author, query)
-    items, pagination = get_pagination(query, 'authors.get_authors')
+    if 'cursor' in request.args:
+        items, pagination = get_cursor_pagination(Author, query, 'authors.get_authors')
+    else:
+        items, pagination = get_pagination(query, 'authors.get_authors')
     # authors = query.all()
-    author = AuthorSchema(**schema_args).dump(items)
+    with profiler.phase('dump'):
+        author = get_schema(AuthorSchema, **schema_args).dump(items)
     return jsonify({
         'success': True,
         'data': author,
@@ -28,8 +36,12 @@ def get_authors():
 
 
 @authors_bp.route('/authors/<int:author_id>', methods=['GET'])
+@read_only
+@conditional_get_resource(Author)
+@response_cache.cached
 def get_author(author_id: int):
-    author = Author.query.get_or_404(author_id, description=f'Author with id {author_id} not found!')
+    author = Author.query.options(*get_loader_options(Author)).get_or_404(
+        author_id, description=f'Author with id {author_id} not found!')
     return jsonify({
         'success': True,
         'data': author_schema.dump(author)
@@ -53,6 +65,7 @@ def create_author(user_id: int, args: dict):
     author = Author(**args)
     db.session.add(author)
     db.session.commit()
+    response_cache.invalidate()
     return jsonify({
         'success': True,
         'data': author_schema.dump(author)
@@ -61,6 +74,7 @@ def create_author(user_id: int, args: dict):
 
 @authors_bp.route('/authors/<int:author_id>', methods=['PUT'])
 @token_required
+@check_if_match(Author)
 @validation_json_content_type
 @use_args(author_schema, error_status_code=400)
 def update_author(user_id: int, args: dict, author_id: int):
@@ -70,6 +84,7 @@ def update_author(user_id: int, args: dict, author_id: int):
     author.birth_date = args['birth_date']
 
     db.session.commit()
+    response_cache.invalidate()
     return jsonify({
         'success': True,
         'data': author_schema.dump(author)
@@ -78,11 +93,94 @@ def update_author(user_id: int, args: dict, author_id: int):
 
 @authors_bp.route('/authors/<int:author_id>', methods=['DELETE'])
 @token_required
+@check_if_match(Author)
 def delete_author(user_id: int, author_id: int):
-    author = Author.query.get_or_404(author_id, description=f'Author with id {author_id} not found!')
-    db.session.delete(author)
+    if request.args.get('background', '').lower() == 'true':
+        if db.session.query(Author.id).filter(Author.id == author_id).scalar() is None:
+            abort(404, f'Author with id {author_id} not found!')
+        job_id = background_tasks.submit('delete_author', _delete_author_in_chunks, author_id, user_id=user_id)
+        return jsonify({
+            'success': True,
+            'data': {
+                'job_id': job_id,
+                'status': url_for('admin.get_job', job_id=job_id)
+            }
+        }), 202
+
+    if not bulk_delete(Author, Author.id == author_id):
+        abort(404, f'Author with id {author_id} not found!')
+    # books are removed by ON DELETE CASCADE
+    TableVersion.mark_changed(db.session, {Book.__tablename__})
     db.session.commit()
+    response_cache.invalidate()
     return jsonify({
         'success': True,
         'data': f'Author with id {author_id} has been deleted'
     })
+
+
+def _delete_author_in_chunks(author_id: int) -> dict:
+    deleted_books = delete_in_chunks(Book, Book.author_id == author_id,
+                                     chunk_size=current_app.config.get('DELETE_CHUNK_SIZE', 1000))
+    bulk_delete(Author, Author.id == author_id)
+    db.session.commit()
+    response_cache.invalidate()
+    return {'deleted_books': deleted_books}
+
+
+@authors_bp.route('/authors:batch', methods=['POST'])
+@token_required
+@validation_json_content_type
+def create_authors_batch(user_id: int):
+    rows, errors = load_batch(AuthorSchema(many=True, exclude=['books']))
+    bulk_insert(Author, list(rows.values()))
+    db.session.commit()
+    response_cache.invalidate()
+    return get_batch_response(AuthorSchema(exclude=['books']), rows, errors, 201)
+
+
+@authors_bp.route('/authors:batch', methods=['PUT'])
+@token_required
+@validation_json_content_type
+def update_authors_batch(user_id: int):
+    items, errors = load_batch(AuthorBatchUpdateSchema(many=True, exclude=['books']))
+    author_ids = {item['id'] for item in items.values()}
+    existing_author_ids = {author_id for author_id, in db.session.query(Author.id).filter(Author.id.in_(author_ids))}
+
+    rows = {}
+    updated_ids = set()
+    for index, item in items.items():
+        if item['id'] not in existing_author_ids:
+            errors[index] = {'id': [f'Author with id {item["id"]} not found!']}
+        elif item['id'] in updated_ids:
+            errors[index] = {'id': [f'Author with id {item["id"]} can be updated only once in batch!']}
+        else:
+            updated_ids.add(item['id'])
+            rows[index] = item
+
+    bulk_update(Author, list(rows.values()))
+    db.session.commit()
+    response_cache.invalidate()
+    return get_batch_response(AuthorBatchUpdateSchema(exclude=['books']), rows, errors, 200)
+
+
+@authors_bp.route('/authors:batch', methods=['DELETE'])
+@token_required
+@validation_json_content_type
+@use_args(batch_delete_schema, error_status_code=400)
+def delete_authors_batch(user_id: int, args: dict):
+    check_batch_size(args['ids'])
+    existing_author_ids = {author_id for author_id, in db.session.query(Author.id).filter(Author.id.in_(args['ids']))}
+    rows, errors = {}, {}
+    for index, author_id in enumerate(args['ids']):
+        if author_id in existing_author_ids:
+            rows[index] = {'id': author_id}
+        else:
+            errors[index] = {'id': [f'Author with id {author_id} not found!']}
+
+    # books of deleted authors are removed by ON DELETE CASCADE
+    bulk_delete(Author, Author.id.in_(existing_author_ids))
+    TableVersion.mark_changed(db.session, {Book.__tablename__})
+    db.session.commit()
+    response_cache.invalidate()
+    return get_batch_response(AuthorSchema(only=['id']), rows, errors, 200)
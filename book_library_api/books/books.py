@@ -1,23 +1,34 @@
-from flask import jsonify, request, abort
+from flask import jsonify, request, abort, current_app, stream_with_context
+from sqlalchemy.orm import joinedload
 from webargs.flaskparser import use_args
-from book_library_api import db
-from book_library_api.models import Book, BooksSchema, book_schema, Author
+from book_library_api import db, response_cache, profiler
+from book_library_api.models import Book, BooksSchema, book_schema, Author, BooksBatchUpdateSchema, \
+    batch_delete_schema
 from book_library_api.utils import validation_json_content_type, get_schema_args, apply_order, apply_filter, \
-    get_pagination, token_required
+    get_schema, get_pagination, get_cursor_pagination, get_loader_options, token_required, \
+    read_only, conditional_get, conditional_get_resource, check_if_match, load_batch, check_batch_size, bulk_insert, \
+    bulk_update, bulk_delete, get_batch_response, filter_new_books
+from book_library_api.export import generate_books_export, EXPORT_FORMATS
+from book_library_api.search import get_search_pagination
 from book_library_api.books import books_bp
 
 
 @books_bp.route('/books', methods=['GET'])
+@read_only
+@conditional_get
+@response_cache.cached
 def get_books():
-    query = Book.query
-    # print(Author.query)
-    # print(authors)
     schema_args = get_schema_args(Book)
+    query = Book.query.options(*get_loader_options(Book, schema_args.get('only')))
     query = apply_order(Book, query)
     query = apply_filter(Book, query)
-    items, pagination = get_pagination(query, 'books.get_books')
+    if 'cursor' in request.args:
+        items, pagination = get_cursor_pagination(Book, query, 'books.get_books')
+    else:
+        items, pagination = get_pagination(query, 'books.get_books')
     # authors = query.all()
-    books = BooksSchema(**schema_args).dump(items)
+    with profiler.phase('dump'):
+        books = get_schema(BooksSchema, **schema_args).dump(items)
     return jsonify({
         'success': True,
         'data': books,
@@ -26,9 +37,47 @@ def get_books():
     })
 
 
+@books_bp.route('/books/search', methods=['GET'])
+@read_only
+@conditional_get
+@response_cache.cached
+def search_books():
+    q = request.args.get('q', '').strip()
+    if not q:
+        abort(400, 'Missing search query q')
+    schema_args = get_schema_args(Book)
+    query = Book.query.options(*get_loader_options(Book, schema_args.get('only')))
+    items, pagination = get_search_pagination(query, q, 'books.search_books')
+    with profiler.phase('dump'):
+        books = get_schema(BooksSchema, **schema_args).dump(items)
+    return jsonify({
+        'success': True,
+        'data': books,
+        'number_of_records': len(books),
+        'pagination': pagination
+    })
+
+
+@books_bp.route('/books:export', methods=['GET'])
+@read_only
+def export_books():
+    file_format = request.args.get('format', 'ndjson')
+    if file_format not in EXPORT_FORMATS:
+        abort(400, f'Format must be one of: {", ".join(EXPORT_FORMATS)}')
+    with_authors = request.args.get('with_authors', '').lower() == 'true'
+    rows = generate_books_export(request.args, file_format, with_authors)
+    return current_app.response_class(stream_with_context(rows), mimetype=EXPORT_FORMATS[file_format], headers={
+        'Content-Disposition': f'attachment; filename=books.{file_format}'
+    })
+
+
 @books_bp.route('/books/<int:books_id>', methods=['GET'])
+@read_only
+@conditional_get_resource(Book)
+@response_cache.cached
 def get_author(books_id: int):
-    book = Book.query.get_or_404(books_id, description=f'Book with id {books_id} not found!')
+    book = Book.query.options(*get_loader_options(Book)).get_or_404(
+        books_id, description=f'Book with id {books_id} not found!')
     return jsonify({
         'success': True,
         'data': book_schema.dump(book)
@@ -37,12 +86,13 @@ def get_author(books_id: int):
 
 @books_bp.route('/books/<int:book_id>', methods=['PUT'])
 @token_required
+@check_if_match(Book)
 @validation_json_content_type
 @use_args(book_schema, error_status_code=400)
 def update_book(user_id: int, args: dict, book_id: int):  # args data after validate
-    book = Book.query.get_or_404(book_id, description=f'Book with id {book_id} not found!')
-    if Book.query.filter(Book.isbn == args['isbn']).first():
-        abort(409, f'Book with isbn {args["isbn"]} already exists!')
+    # isbn uniqueness is checked by the database, IntegrityError is turned into 409 by errors blueprint
+    book = Book.query.options(joinedload(Book.author)) \
+        .get_or_404(book_id, description=f'Book with id {book_id} not found!')
     book.title = args['title']
     book.isbn = args['isbn']
     book.number_of_pages = args['number_of_pages']
@@ -50,22 +100,27 @@ def update_book(user_id: int, args: dict, book_id: int):  # args data after vali
     if description is not None:
         book.description = description
     author_id = args.get('author_id')
-    if author_id is not None:
-        Author.query.get_or_404(author_id, description=f'Author with id {author_id} not found!')
-        book.author_id = author_id
+    if author_id is not None and author_id != book.author_id:
+        book.author = Author.query.get_or_404(author_id, description=f'Author with id {author_id} not found!')
+    db.session.flush()
+    # dumped before commit, which would expire the book and reload it
+    data = book_schema.dump(book)
     db.session.commit()
+    response_cache.invalidate()
     return jsonify({
         'success': True,
-        'data': book_schema.dump(book)
+        'data': data
     })
 
 
 @books_bp.route('/books/<int:book_id>', methods=['DELETE'])
 @token_required
+@check_if_match(Book)
 def delete_book(user_id: int, book_id: int):
-    book = Book.query.get_or_404(book_id, description=f'Book with id {book_id} not found!')
-    db.session.delete(book)
+    if not bulk_delete(Book, Book.id == book_id):
+        abort(404, f'Book with id {book_id} not found!')
     db.session.commit()
+    response_cache.invalidate()
     return jsonify({
         'success': True,
         'data': f'Book with id {book_id} has been deleted'
@@ -73,10 +128,14 @@ def delete_book(user_id: int, book_id: int):
 
 
 @books_bp.route('/authors/<int:author_id>/books', methods=['GET'])
+@read_only
+@conditional_get
+@response_cache.cached
 def get_all_author_books(author_id: int):
     Author.query.get_or_404(author_id, description=f'Author with id {author_id} not found!')
     books = Book.query.filter(Book.author_id == author_id).all()
-    items = BooksSchema(many=True, exclude=['author']).dump(books)
+    with profiler.phase('dump'):
+        items = get_schema(BooksSchema, many=True, exclude=('author',)).dump(books)
     return jsonify({
         'success': True,
         'data': items,
@@ -89,17 +148,84 @@ def get_all_author_books(author_id: int):
 @validation_json_content_type
 @use_args(BooksSchema(exclude=['author_id']), error_status_code=400)
 def create_book(user_id: int, args: dict, author_id: int):
-    print(args)
-    Author.query.get_or_404(author_id, description=f'Author with id {author_id} not found!')
-    if Book.query.filter(Book.isbn == args['isbn']).first():
-        abort(409, f'Book with isbn {args["isbn"]} already exists!')
-
-    book = Book(author_id=author_id, **args)
+    # author is part of the response, so it is loaded anyway - isbn uniqueness is checked by the database
+    author = Author.query.get_or_404(author_id, description=f'Author with id {author_id} not found!')
+    book = Book(author=author, **args)
 
     db.session.add(book)
+    db.session.flush()
+    data = book_schema.dump(book)
     db.session.commit()
+    response_cache.invalidate()
 
     return jsonify({
         'success': True,
-        'data': book_schema.dump(book)
+        'data': data
     }), 201
+
+
+@books_bp.route('/books:batch', methods=['POST'])
+@token_required
+@validation_json_content_type
+def create_books_batch(user_id: int):
+    items, errors = load_batch(BooksSchema(many=True, exclude=['author']))
+    rows = filter_new_books(items, errors)
+    bulk_insert(Book, list(rows.values()))
+    db.session.commit()
+    response_cache.invalidate()
+    return get_batch_response(BooksSchema(exclude=['author']), rows, errors, 201)
+
+
+@books_bp.route('/books:batch', methods=['PUT'])
+@token_required
+@validation_json_content_type
+def update_books_batch(user_id: int):
+    items, errors = load_batch(BooksBatchUpdateSchema(many=True, exclude=['author']))
+    book_ids = {item['id'] for item in items.values()}
+    existing_book_ids = {book_id for book_id, in db.session.query(Book.id).filter(Book.id.in_(book_ids))}
+    author_ids = {item['author_id'] for item in items.values() if 'author_id' in item}
+    existing_author_ids = {author_id for author_id, in db.session.query(Author.id).filter(Author.id.in_(author_ids))}
+    isbns = {item['isbn'] for item in items.values()}
+    isbn_owners = dict(db.session.query(Book.isbn, Book.id).filter(Book.isbn.in_(isbns)))
+
+    rows = {}
+    updated_ids = set()
+    for index, item in items.items():
+        author_id = item.get('author_id')
+        if item['id'] not in existing_book_ids:
+            errors[index] = {'id': [f'Book with id {item["id"]} not found!']}
+        elif item['id'] in updated_ids:
+            errors[index] = {'id': [f'Book with id {item["id"]} can be updated only once in batch!']}
+        elif author_id is not None and author_id not in existing_author_ids:
+            errors[index] = {'author_id': [f'Author with id {author_id} not found!']}
+        elif isbn_owners.get(item['isbn'], item['id']) != item['id']:
+            errors[index] = {'isbn': [f'Book with isbn {item["isbn"]} already exists!']}
+        else:
+            updated_ids.add(item['id'])
+            isbn_owners[item['isbn']] = item['id']
+            rows[index] = item
+
+    bulk_update(Book, list(rows.values()))
+    db.session.commit()
+    response_cache.invalidate()
+    return get_batch_response(BooksBatchUpdateSchema(exclude=['author']), rows, errors, 200)
+
+
+@books_bp.route('/books:batch', methods=['DELETE'])
+@token_required
+@validation_json_content_type
+@use_args(batch_delete_schema, error_status_code=400)
+def delete_books_batch(user_id: int, args: dict):
+    check_batch_size(args['ids'])
+    existing_book_ids = {book_id for book_id, in db.session.query(Book.id).filter(Book.id.in_(args['ids']))}
+    rows, errors = {}, {}
+    for index, book_id in enumerate(args['ids']):
+        if book_id in existing_book_ids:
+            rows[index] = {'id': book_id}
+        else:
+            errors[index] = {'id': [f'Book with id {book_id} not found!']}
+
+    bulk_delete(Book, Book.id.in_(existing_book_ids))
+    db.session.commit()
+    response_cache.invalidate()
+    return get_batch_response(BooksSchema(only=['id']), rows, errors, 200)
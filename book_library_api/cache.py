@@ -0,0 +1,159 @@
+import time
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from typing import Optional, Tuple
+from urllib.parse import urlencode
+
+from flask import Flask, current_app, g, request
+
+
+# cached value: (body, status code, headers)
+CachedResponse = Tuple[bytes, int, list]
+
+
+class CacheBackend:
+    """Storage interface for ResponseCache - a shared store (e.g. redis) for multi-process deployments
+    has to implement the same methods."""
+
+    evictions = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: CachedResponse, ttl: int) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class NullCacheBackend(CacheBackend):
+    def get(self, key: str) -> Optional[CachedResponse]:
+        return None
+
+    def set(self, key: str, value: CachedResponse, ttl: int) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def __len__(self) -> int:
+        return 0
+
+
+class LRUCacheBackend(CacheBackend):
+    """In-process cache bounded by number of entries, least recently used entries are evicted first."""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CachedResponse, ttl: int) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+cache_backends = {
+    'lru': lambda app: LRUCacheBackend(app.config.get('CACHE_MAX_SIZE', 1024)),
+    'null': lambda app: NullCacheBackend()
+}
+
+
+class ResponseCache:
+    """Caches successful GET responses keyed on path + normalized query string + ETag of the response
+    (table versions for lists, row versions for single resources).
+
+    Write handlers call invalidate() after commit to free memory. A write in another worker process
+    changes the versions, so entries of in-process backends are never served stale.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask, backend: Optional[CacheBackend] = None) -> None:
+        if backend is None:
+            backend = cache_backends[app.config.get('CACHE_BACKEND', 'null')](app)
+        app.extensions['response_cache'] = {
+            'backend': backend,
+            'hits': 0,
+            'misses': 0
+        }
+
+    @staticmethod
+    def _state() -> dict:
+        return current_app.extensions['response_cache']
+
+    @property
+    def backend(self) -> CacheBackend:
+        return self._state()['backend']
+
+    @staticmethod
+    def make_key() -> str:
+        # the same params in a different order give the same key
+        return f'{request.path}?{urlencode(sorted(request.args.items(multi=True)))}'
+
+    def cached(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            from book_library_api.utils import get_table_versions
+            state = self._state()
+            # ETag of conditional GET covers versions of all rows in the response
+            validator = g.get('etag') or ','.join(f'{name}:{version}' for name, version in get_table_versions())
+            key = self.make_key() + '|' + validator
+            cached_response = state['backend'].get(key)
+            if cached_response is not None:
+                state['hits'] += 1
+                body, status, headers = cached_response
+                return current_app.response_class(body, status=status, headers=headers)
+            state['misses'] += 1
+            response = current_app.make_response(func(*args, **kwargs))
+            if response.status_code == 200:
+                state['backend'].set(key, (response.get_data(), response.status_code, list(response.headers)),
+                                     current_app.config.get('CACHE_TTL', 60))
+            return response
+        return wrapper
+
+    def invalidate(self) -> None:
+        # books responses contain authors and authors responses contain books - drop everything
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        state = self._state()
+        return {
+            'backend': state['backend'].__class__.__name__,
+            'size': len(state['backend']),
+            'hits': state['hits'],
+            'misses': state['misses'],
+            'evictions': state['backend'].evictions
+        }
@@ -1,18 +1,18 @@
 import json
+import time
+import click
+from itertools import islice
 from pathlib import Path
-from datetime import datetime
 
 
-from book_library_api import db
-from book_library_api.models import Author, Book
+from book_library_api import db, response_cache
+from book_library_api.models import TableVersion, VERSIONED_TABLES
+from book_library_api.importer import import_records, read_records, IMPORT_FORMATS, IMPORT_MODELS
+from book_library_api.export import generate_books_export, EXPORT_FORMATS
 from book_library_api.commands import db_manage_bp
 
 
-def load_json_data(file_name: str) -> list:
-    json_path = Path(__file__).parent.parent / 'samples' / file_name
-    with open(json_path) as file:
-        data_json = json.load(file)
-    return data_json
+SAMPLES_DIR = Path(__file__).parent.parent / 'samples'
 
 
 @db_manage_bp.cli.group()
@@ -24,22 +24,60 @@ def db_manage():
 @db_manage.command()
 def add_data():
     """"Add data to database from sample file json"""
-    try:
-        data_json = load_json_data('authors.json')
-        for item in data_json:
-            item['birth_date'] = datetime.strptime(item['birth_date'], '%d-%m-%Y').date()
-            author = Author(**item)
-            db.session.add(author)
+    for model_name, file_name in (('authors', 'authors.json'), ('books', 'books.json')):
+        with open(SAMPLES_DIR / file_name) as file:
+            for _, _, rejected in import_records(model_name, read_records(file, 'json')):
+                for _, record, errors in rejected:
+                    print(f'Rejected {model_name} record {record}: {errors}')
+    print("Data was saved in database")
 
-        data_json = load_json_data('books.json')
-        for item in data_json:
-            book = Book(**item)
-            db.session.add(book)
 
-        db.session.commit()
-        print("Data was saved in database")
-    except Exception as exc:
-        print("unexpected error : {}".format(exc))
+@db_manage.command()
+@click.argument('file_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--model', 'model_name', type=click.Choice(list(IMPORT_MODELS)), required=True)
+@click.option('--format', 'file_format', type=click.Choice(IMPORT_FORMATS), help='Detected from file extension by default')
+@click.option('--batch-size', type=int, default=1000, show_default=True)
+@click.option('--rejects', type=click.File('w'), help='Write rejected records with errors as NDJSON')
+@click.option('--resume', is_flag=True, help='Skip records processed by previous interrupted run')
+def import_data(file_path, model_name, file_format, batch_size, rejects, resume):
+    """Import authors or books from large JSON, NDJSON or CSV file"""
+    file_format = file_format or Path(file_path).suffix[1:].lower()
+    if file_format not in IMPORT_FORMATS:
+        raise click.BadParameter(f'cannot detect format of {file_path}', param_hint='--format')
+
+    # number of processed records is saved after every committed batch
+    checkpoint_path = Path(f'{file_path}.checkpoint')
+    processed = 0
+    if resume and checkpoint_path.exists():
+        processed = json.loads(checkpoint_path.read_text())['processed']
+        click.echo(f'Resuming after {processed} records')
+    imported, rejected = 0, 0
+    start = time.perf_counter()
+
+    try:
+        with open(file_path, newline='') as file:
+            records = islice(read_records(file, file_format), processed, None)
+            for batch_processed, batch_imported, batch_rejected in import_records(model_name, records, batch_size):
+                if rejects:
+                    for index, record, errors in batch_rejected:
+                        rejects.write(json.dumps({
+                            'record_number': processed + index + 1,
+                            'record': record,
+                            'errors': errors
+                        }) + '\n')
+                processed += batch_processed
+                imported += batch_imported
+                rejected += len(batch_rejected)
+                checkpoint_path.write_text(json.dumps({'processed': processed}))
+                elapsed = time.perf_counter() - start
+                click.echo(f'{processed} records processed, {imported} imported, {rejected} rejected '
+                           f'({imported / elapsed:.0f} rows/s)')
+    except ValueError as error:
+        # broken file structure, checkpoint keeps committed batches - run can be resumed after fixing the file
+        raise click.ClickException(f'Cannot read {file_path}, {error}')
+
+    checkpoint_path.unlink(missing_ok=True)
+    click.echo(f'Import finished in {time.perf_counter() - start:.2f}s: {imported} imported, {rejected} rejected')
 
 
 @db_manage.command()
@@ -48,10 +86,34 @@ def remove_data():
     try:
         # db.session.execute('TRUNCATE TABLE authors')
         db.session.execute('DELETE FROM book')
-        db.session.execute('ALTER SEQUENCE book_id_seq RESTART WITH 1')
         db.session.execute('DELETE FROM authors')
-        db.session.execute('ALTER SEQUENCE authors_id_seq RESTART WITH 1')
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute('ALTER SEQUENCE book_id_seq RESTART WITH 1')
+            db.session.execute('ALTER SEQUENCE authors_id_seq RESTART WITH 1')
+        # raw deletes skip session flush events - ETags and cached counts must change too
+        TableVersion.mark_changed(db.session, VERSIONED_TABLES)
         db.session.commit()
+        response_cache.invalidate()
         print("Data was removed from database")
     except Exception as exc:
         print("unexpected error : {}".format(exc))
+
+
+@db_manage.command()
+@click.option('--format', 'file_format', type=click.Choice(list(EXPORT_FORMATS)), default='ndjson')
+@click.option('--output', type=click.File('w'), default='-', help='Output file, stdout by default')
+@click.option('--with-authors', is_flag=True, help='Add author first and last name to every book')
+@click.option('--filter', 'filters', multiple=True, help='Same syntax as query string, e.g. number_of_pages[gt]=300')
+@click.option('--sort', help='Same syntax as query string, e.g. -number_of_pages,title')
+def export(file_format, output, with_authors, filters, sort):
+    """Export books as NDJSON or CSV"""
+    args = {}
+    for item in filters:
+        if '=' not in item:
+            raise click.BadParameter(f'{item} - expected param=value', param_hint='--filter')
+        param, value = item.split('=', 1)
+        args[param] = value
+    if sort:
+        args['sort'] = sort
+    for chunk in generate_books_export(args, file_format, with_authors):
+        output.write(chunk)
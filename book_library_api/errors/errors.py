@@ -1,4 +1,6 @@
-from flask import Response, jsonify
+import re
+from flask import Response, jsonify, request
+from sqlalchemy.exc import IntegrityError
 from book_library_api import db
 from book_library_api.errors import errors_bp
 
@@ -19,7 +21,10 @@ class ErrorResponse:
 
 @errors_bp.app_errorhandler(400)
 def bad_request_error(err):
-    messages = err.data.get('messages', {}).get('json', {})
+    data = getattr(err, 'data', None)
+    if data is None:
+        return ErrorResponse(err.description, 400).to_response()
+    messages = data.get('messages', {}).get('json', {})
     return ErrorResponse(messages, 400).to_response()
 
 
@@ -28,6 +33,11 @@ def unauthorized_error(err):
     return ErrorResponse(err.description, 401).to_response()
 
 
+@errors_bp.app_errorhandler(403)
+def forbidden_error(err):
+    return ErrorResponse(err.description, 403).to_response()
+
+
 @errors_bp.app_errorhandler(404)
 def not_found_error(err):
     return ErrorResponse(err.description, 404).to_response()
@@ -38,11 +48,49 @@ def conflict_error(err):
     return ErrorResponse(err.description, 409).to_response()
 
 
+UNIQUE_VIOLATION_PATTERNS = (
+    re.compile(r'UNIQUE constraint failed: \w+\.(?P<column>\w+)'),  # sqlite
+    re.compile(r'Key \((?P<column>\w+)\)=\((?P<value>.*)\) already exists')  # postgresql
+)
+
+
+@errors_bp.app_errorhandler(IntegrityError)
+def integrity_error(err):
+    # writes rely on database constraints instead of checking for duplicates first
+    db.session.rollback()
+    for pattern in UNIQUE_VIOLATION_PATTERNS:
+        match = pattern.search(str(err.orig))
+        if match:
+            column = match.group('column')
+            value = match.groupdict().get('value')
+            data = request.get_json(silent=True)
+            # batch endpoints send a list, which does not tell which item conflicts
+            if value is None and isinstance(data, dict):
+                value = data.get(column)
+            message = f'{column.capitalize()} {value} already exists!' if value is not None \
+                else f'{column.capitalize()} already exists!'
+            return ErrorResponse(message, 409).to_response()
+    return ErrorResponse('Request conflicts with existing data', 409).to_response()
+
+
+@errors_bp.app_errorhandler(412)
+def precondition_failed_error(err):
+    return ErrorResponse(err.description, 412).to_response()
+
+
 @errors_bp.app_errorhandler(415)
 def unsupported_media_type_error(err):
     return ErrorResponse(err.description, 415).to_response()
 
 
+@errors_bp.app_errorhandler(429)
+def too_many_requests_error(err):
+    response = ErrorResponse(err.description, 429).to_response()
+    if getattr(err, 'retry_after', None):
+        response.headers['Retry-After'] = str(err.retry_after)
+    return response
+
+
 @errors_bp.app_errorhandler(500)
 def internal_server_error(err):
     # if error occur when database connection open
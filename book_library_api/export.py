@@ -0,0 +1,52 @@
+import csv
+import io
+import json
+from typing import Iterator, Mapping
+
+from flask import current_app
+from book_library_api.models import Book, Author
+from book_library_api.utils import apply_filter, apply_order
+
+
+BOOK_COLUMNS = [Book.id, Book.title, Book.isbn, Book.number_of_pages, Book.description, Book.author_id]
+AUTHOR_COLUMNS = [Author.first_name.label('author_first_name'), Author.last_name.label('author_last_name')]
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+def _get_export_rows(args: Mapping, columns: list, with_authors: bool) -> Iterator[dict]:
+    query = Book.query
+    if with_authors:
+        query = query.join(Book.author)
+    query = apply_order(Book, query, args)
+    query = apply_filter(Book, query, args)
+    # rows are plain tuples - nothing is kept in session identity map, server side cursor on postgresql
+    query = query.order_by(Book.id).with_entities(*columns).execution_options(stream_results=True)
+    for row in query.yield_per(current_app.config.get('EXPORT_CHUNK_SIZE', 1000)):
+        yield row._asdict()
+
+
+def generate_books_export(args: Mapping, file_format: str = 'ndjson', with_authors: bool = False) -> Iterator[str]:
+    """Yield books in chunks of EXPORT_CHUNK_SIZE rows, memory usage does not depend on table size."""
+    columns = BOOK_COLUMNS + AUTHOR_COLUMNS if with_authors else BOOK_COLUMNS
+    chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+    buffer = io.StringIO()
+    writer = None
+    if file_format == 'csv':
+        writer = csv.DictWriter(buffer, [column.key for column in columns])
+        writer.writeheader()
+
+    for index, row in enumerate(_get_export_rows(args, columns, with_authors), 1):
+        if writer is not None:
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(row) + '\n')
+        if index % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,49 @@
+from threading import BoundedSemaphore
+from typing import Optional
+
+from flask import Flask, current_app
+from werkzeug.exceptions import TooManyRequests
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasher:
+    """Limits number of request threads computing password hashes at once.
+
+    At most PASSWORD_HASH_CONCURRENCY hashes are computed at once (by default a quarter of WORKER_THREADS),
+    so a burst of logins leaves threads for other endpoints. Further requests wait up to PASSWORD_HASH_WAIT
+    seconds for a free slot - about the time of a few hashes - and then fail with 429.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        app.extensions['password_hasher'] = {
+            'slots': BoundedSemaphore(app.config.get('PASSWORD_HASH_CONCURRENCY', 2)),
+            'wait': app.config.get('PASSWORD_HASH_WAIT', 0.5)
+        }
+
+    @staticmethod
+    def _run(func, *args):
+        state = current_app.extensions['password_hasher']
+        if not state['slots'].acquire(timeout=state['wait']):
+            raise TooManyRequests('Too many authentication requests. Please try again later', retry_after=1)
+        try:
+            return func(*args)
+        finally:
+            state['slots'].release()
+
+    @staticmethod
+    def _method() -> str:
+        return current_app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000')
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self._method())
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        # stored hash starts with method used to create it, e.g. pbkdf2:sha256:260000$salt$hash
+        return password_hash.split('$', 1)[0] != self._method()
@@ -0,0 +1,161 @@
+import csv
+import io
+import json
+from collections import Counter
+from typing import IO, Iterator, Optional, Tuple
+
+from flask_sqlalchemy import DefaultMeta
+from marshmallow import EXCLUDE
+from book_library_api import db
+from book_library_api.models import Author, AuthorSchema, Book, BooksSchema, TableVersion
+from book_library_api.utils import validate_batch, filter_new_books, fill_missing_keys
+
+
+READ_SIZE = 64 * 1024
+# look-ahead limit for a single JSON element, malformed element is not searched for until end of file
+MAX_RECORD_SIZE = 1024 * 1024
+COPY_NULL = r'\N'
+IMPORT_FORMATS = ['json', 'ndjson', 'csv']
+# unknown columns (e.g. id or author names from export file) are skipped
+IMPORT_MODELS = {
+    'authors': (Author, lambda: AuthorSchema(many=True, exclude=['books'], unknown=EXCLUDE)),
+    'books': (Book, lambda: BooksSchema(many=True, exclude=['author'], unknown=EXCLUDE))
+}
+
+
+def _find_element_end(buffer: str, position: int) -> Optional[int]:
+    # index of comma or bracket closing the list after the element starting at position, None if not in buffer
+    depth, in_string, escaped = 0, False, False
+    for index in range(position, len(buffer)):
+        char = buffer[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '[{':
+            depth += 1
+        elif char in ']}':
+            if depth == 0:
+                return index
+            depth -= 1
+        elif char == ',' and depth == 0:
+            return index
+    return None
+
+
+def _read_json(file: IO) -> Iterator:
+    # top level list is decoded item by item, whole file is never loaded into memory
+    decoder = json.JSONDecoder()
+    buffer, position, started, number = '', 0, False, 0
+    while True:
+        chunk = file.read(READ_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and (buffer[position].isspace() or buffer[position] == ','):
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError('JSON file must contain a list')
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            number += 1
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                end = _find_element_end(buffer, position)
+                if end is not None:
+                    # whole element is in buffer - rejected by schema validation as invalid input type
+                    item, position = buffer[position:end].strip(), end
+                elif not chunk:
+                    raise ValueError(f'record {number}: unexpected end of JSON file')
+                elif len(buffer) - position > MAX_RECORD_SIZE:
+                    raise ValueError(f'record {number}: larger than {MAX_RECORD_SIZE} characters')
+                else:
+                    # item is split between chunks
+                    number -= 1
+                    break
+            yield item
+        if not chunk:
+            raise ValueError(f'record {number + 1}: unexpected end of JSON file')
+
+
+def _read_ndjson(file: IO) -> Iterator:
+    for line in file:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # rejected by schema validation as invalid input type
+                yield line
+
+
+def read_records(file: IO, file_format: str) -> Iterator:
+    if file_format == 'json':
+        return _read_json(file)
+    if file_format == 'ndjson':
+        return _read_ndjson(file)
+    return csv.DictReader(file)
+
+
+def _write_copy_rows(rows: list, columns: list) -> io.StringIO:
+    buffer = io.StringIO()
+    # None is written as unquoted NULL marker, quoted empty string stays an empty string
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([COPY_NULL if row.get(column) is None else row[column] for column in columns])
+    buffer.seek(0)
+    return buffer
+
+
+def _copy_insert(model: DefaultMeta, rows: list) -> None:
+    keys = set().union(*rows)
+    columns = [column.name for column in model.__table__.columns if column.name in keys]
+    buffer = _write_copy_rows(rows, columns)
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(f'COPY {model.__tablename__} ({", ".join(columns)}) FROM STDIN '
+                       f"WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer)
+
+
+def import_records(model_name: str, records: Iterator, batch_size: int = 1000) -> Iterator[Tuple[int, int, list]]:
+    """Validate and insert records in batches, every batch is committed separately.
+
+    Yields (number of processed records, number of imported rows, rejected records) for every batch,
+    rejected records are (index in batch, record, errors) tuples.
+    """
+    records = iter(records)
+    model, schema_factory = IMPORT_MODELS[model_name]
+    schema = schema_factory()
+    use_copy = db.engine.dialect.name == 'postgresql'
+    while True:
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) == batch_size:
+                break
+        if not batch:
+            return
+
+        items, errors = validate_batch(schema, batch)
+        rows = filter_new_books(items, errors) if model is Book else items
+        if rows:
+            if use_copy:
+                _copy_insert(model, list(rows.values()))
+            else:
+                db.session.execute(model.__table__.insert(), fill_missing_keys(list(rows.values())))
+            TableVersion.mark_changed(db.session, {model.__tablename__})
+            if model is Book:
+                Author.update_books_count(db.session.connection(),
+                                          Counter(row['author_id'] for row in rows.values()))
+        db.session.commit()
+        yield len(batch), len(rows), [(index, batch[index], errors[index]) for index in sorted(errors)]
@@ -0,0 +1,39 @@
+from flask.json import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+class OrjsonEncoder(JSONEncoder):
+    """Encodes responses with orjson. Dates and objects orjson can not serialize go through
+    JSONEncoder.default, so output matches the json module apart from non-ASCII characters,
+    which are written as UTF-8 instead of \\u escapes.
+    """
+
+    def encode(self, o) -> str:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.indent == 2:
+            option |= orjson.OPT_INDENT_2
+        elif self.indent is not None:
+            return super().encode(o)
+        try:
+            return orjson.dumps(o, default=self.default, option=option).decode()
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits
+            return super().encode(o)
+
+
+json_encoders = {
+    'json': JSONEncoder
+}
+if orjson is not None:
+    json_encoders['orjson'] = OrjsonEncoder
+
+
+def get_json_encoder(name: str) -> type:
+    # fall back to json module when orjson is not installed
+    return json_encoders.get(name, JSONEncoder)
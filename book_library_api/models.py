@@ -1,7 +1,11 @@
-from book_library_api import db
+import sqlite3
+from collections import Counter, defaultdict
+from itertools import chain
+from book_library_api import db, password_hasher
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
 from marshmallow import Schema, fields, validate, validates, ValidationError
-from datetime import datetime, date, timedelta
-from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime, timedelta
 import jwt
 from flask import current_app
 
@@ -10,40 +14,50 @@ class Author(db.Model):
     __tablename__ = 'authors'
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String, nullable=False)
-    last_name = db.Column(db.String, nullable=False)
-    birth_date = db.Column(db.Date, nullable=False)
-    books = db.relationship('Book', back_populates='author', cascade='all, delete-orphan')
+    last_name = db.Column(db.String, nullable=False, index=True)
+    birth_date = db.Column(db.Date, nullable=False, index=True)
+    # denormalized number of books, kept up to date by every books write - authors can be sorted by it without join
+    books_count = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+    # row version for If-Match, incremented by every UPDATE statement - also bulk and books_count updates
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                        onupdate=db.literal_column('version') + 1, info={'internal': True})
+    # books are removed by ON DELETE CASCADE in the database, without loading them
+    books = db.relationship('Book', back_populates='author', cascade='all, delete-orphan', passive_deletes=True)
 
     def __repr__(self):
         return f'<{self.__class__.__name__}>: id: {self.id} : {self.first_name} {self.last_name}'
 
     @staticmethod
-    def additional_validation(param: str, value: str) -> date:
-        if param == 'birth_date':
-            try:
-                value = datetime.strptime(value, '%d-%m-%Y').date()
-            except ValueError:
-                value = None
-        return value
+    def update_books_count(connection, deltas: dict) -> None:
+        # relative update is safe with concurrent writers, one statement per distinct change
+        table = Author.__table__
+        author_ids = defaultdict(list)
+        for author_id, delta in deltas.items():
+            if delta:
+                author_ids[delta].append(author_id)
+        for delta in sorted(author_ids):
+            connection.execute(
+                table.update()
+                .where(table.c.id.in_(sorted(author_ids[delta])))
+                .values(books_count=table.c.books_count + delta)
+            )
 
 
 class Book(db.Model):
     __tablename__ = 'book'
     id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(50), nullable=False)
+    title = db.Column(db.String(50), nullable=False, index=True)
     isbn = db.Column(db.BigInteger, nullable=False, unique=True)
-    number_of_pages = db.Column(db.Integer, nullable=False)
+    number_of_pages = db.Column(db.Integer, nullable=False, index=True)
     description = db.Column(db.Text, nullable=True)
-    author_id = db.Column(db.Integer, db.ForeignKey('authors.id'), nullable=False)
+    author_id = db.Column(db.Integer, db.ForeignKey('authors.id', ondelete='CASCADE'), nullable=False, index=True)
     author = db.relationship('Author', back_populates='books')
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                        onupdate=db.literal_column('version') + 1, info={'internal': True})
 
     def __repr__(self):
         return f'{self.title} - {self.author.first_name} {self.author.last_name}'
 
-    @staticmethod
-    def additional_validation(param: str, value: str) -> str:
-        return value
-
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -54,11 +68,18 @@ class User(db.Model):
     creation_date = db.Column(db.DateTime, default=datetime.utcnow)
 
     @staticmethod
-    def generate_hashed_password(password: str) -> bin:
-        return generate_password_hash(password)
+    def generate_hashed_password(password: str) -> str:
+        return password_hasher.hash(password)
 
     def is_password_valid(self, password: str) -> bool:
-        return check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password)
+
+    def rehash_password_if_needed(self, password: str) -> bool:
+        # hash parameters from config may change (e.g. more iterations), stored hash is upgraded on login
+        if password_hasher.needs_rehash(self.password):
+            self.password = self.generate_hashed_password(password)
+            return True
+        return False
 
     def generate_jwt(self) -> bytes:
         payload = {
@@ -68,12 +89,101 @@ class User(db.Model):
         return jwt.encode(payload, current_app.config.get('SECRET_KEY'))
 
 
+class TableVersion(db.Model):
+    # version counter per table - cheap ETag / Last-Modified source for collections and response cache key
+    __tablename__ = 'table_versions'
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @staticmethod
+    def bump(connection, table_names: set) -> None:
+        table = TableVersion.__table__
+        now = datetime.utcnow()
+        for table_name in sorted(table_names):
+            result = connection.execute(
+                table.update()
+                .where(table.c.table_name == table_name)
+                .values(version=table.c.version + 1, updated_at=now)
+            )
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(table_name=table_name, version=1, updated_at=now))
+
+    @staticmethod
+    def mark_changed(session, table_names: set) -> None:
+        # bumped right after commit in own short transaction, writers do not hold lock of the shared rows
+        session.info.setdefault('changed_tables', set()).update(table_names)
+
+
+VERSIONED_TABLES = {Author.__tablename__, Book.__tablename__}
+
+
+@event.listens_for(Engine, 'connect')
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # sqlite checks foreign keys (and runs ON DELETE CASCADE) only when asked to
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute('PRAGMA foreign_keys=ON')
+
+
+@event.listens_for(db.session, 'after_flush')
+def bump_table_versions(session, flush_context):
+    # new/dirty/deleted still hold pre-flush state here, cascade deletes are included
+    # objects dirty only through a collection (author.books on a new book) are not updated
+    dirty = (obj for obj in session.dirty if session.is_modified(obj, include_collections=False))
+    table_names = {obj.__table__.name for obj in chain(session.new, dirty, session.deleted)}
+    table_names &= VERSIONED_TABLES
+    if table_names:
+        TableVersion.mark_changed(session, table_names)
+
+
+@event.listens_for(db.session, 'after_commit')
+def commit_table_versions(session):
+    table_names = session.info.pop('changed_tables', None)
+    if table_names:
+        with db.engine.begin() as connection:
+            TableVersion.bump(connection, table_names)
+
+
+@event.listens_for(db.session, 'after_transaction_end')
+def forget_changed_tables(session, transaction):
+    # rolled back writes do not change versions
+    if transaction.parent is None:
+        session.info.pop('changed_tables', None)
+
+
+@event.listens_for(db.session, 'after_flush')
+def update_authors_books_count(session, flush_context):
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, Book):
+            deltas[obj.author_id] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Book):
+            deltas[obj.author_id] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Book):
+            history = inspect(obj).attrs.author_id.history
+            for author_id in history.added:
+                deltas[author_id] += 1
+            for author_id in history.deleted:
+                deltas[author_id] -= 1
+    if not any(deltas.values()):
+        return
+    Author.update_books_count(session.connection(), deltas)
+    # counter was changed in the database, loaded authors read it again on next access
+    for author_id in deltas:
+        author = session.identity_map.get(inspect(Author).identity_key_from_primary_key([author_id]))
+        if author is not None:
+            session.expire(author, ['books_count'])
+
+
 # from db to json - serialize and validation
 class AuthorSchema(Schema):
     id = fields.Integer(dump_only=True)
     first_name = fields.String(required=True, validate=validate.Length(max=10))
     last_name = fields.String(required=True, validate=validate.Length(max=10))
     birth_date = fields.Date('%d-%m-%Y', required=True)
+    books_count = fields.Integer(dump_only=True)
     books = fields.List(fields.Nested(lambda: BooksSchema(exclude=['author'])))
 
     # validate date field
@@ -98,6 +208,18 @@ class BooksSchema(Schema):
             raise ValidationError('ISBN must contains 13 digits')
 
 
+class AuthorBatchUpdateSchema(AuthorSchema):
+    id = fields.Integer(required=True)
+
+
+class BooksBatchUpdateSchema(BooksSchema):
+    id = fields.Integer(required=True)
+
+
+class BatchDeleteSchema(Schema):
+    ids = fields.List(fields.Integer(), required=True, validate=validate.Length(min=1))
+
+
 class UsersSchema(Schema):
     id = fields.Integer(dump_only=True)
     username = fields.String(required=True, validate=validate.Length(max=255))
@@ -114,4 +236,5 @@ class UserSchemaUpdatePassword(Schema):
 author_schema = AuthorSchema()
 book_schema = BooksSchema()
 user_schema = UsersSchema()
-user_schema_update_password = UserSchemaUpdatePassword()
\ No newline at end of file
+user_schema_update_password = UserSchemaUpdatePassword()
+batch_delete_schema = BatchDeleteSchema()
\ No newline at end of file
@@ -0,0 +1,90 @@
+import time
+from threading import Lock
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import Pool, QueuePool
+
+
+# upper bounds of checkout wait time histogram buckets in milliseconds
+WAIT_TIME_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, float('inf'))
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.wait_time_sum_ms = 0.0
+        self.wait_time_buckets = [0] * len(WAIT_TIME_BUCKETS_MS)
+        self._lock = Lock()
+
+    def observe_checkout(self, wait_time_ms: float, overflow: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.overflow_checkouts += overflow
+            self.wait_time_sum_ms += wait_time_ms
+            for index, upper_bound in enumerate(WAIT_TIME_BUCKETS_MS):
+                if wait_time_ms <= upper_bound:
+                    self.wait_time_buckets[index] += 1
+                    break
+
+    def increment(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'overflow_checkouts': self.overflow_checkouts,
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'soft_invalidations': self.soft_invalidations,
+                'wait_time_sum_ms': round(self.wait_time_sum_ms, 3),
+                'wait_time_histogram_ms': {
+                    str(upper_bound): count for upper_bound, count in zip(WAIT_TIME_BUCKETS_MS, self.wait_time_buckets)
+                }
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool which measures how long checkouts wait for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        event.listen(self, 'connect', lambda *args: self.metrics.increment('connects'))
+        event.listen(self, 'invalidate', lambda *args: self.metrics.increment('invalidations'))
+        event.listen(self, 'soft_invalidate', lambda *args: self.metrics.increment('soft_invalidations'))
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.increment('timeouts')
+            raise
+        self.metrics.observe_checkout((time.perf_counter() - start) * 1000, self.overflow() > 0)
+        return connection
+
+
+def get_pool_stats(pool: Pool) -> dict:
+    stats = {
+        'pool_class': pool.__class__.__name__,
+        'status': pool.status()
+    }
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow()
+        })
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is not None:
+        stats['metrics'] = metrics.to_dict()
+    return stats
@@ -0,0 +1,181 @@
+import cProfile
+import hmac
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+from flask import Flask, Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# upper bounds of request phase histogram buckets in milliseconds
+DURATION_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+PHASES = ('sql', 'dump', 'encode', 'total')
+
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS_MS)
+
+    def observe(self, value_ms: float) -> None:
+        self.count += 1
+        self.sum += value_ms
+        for index, upper_bound in enumerate(DURATION_BUCKETS_MS):
+            if value_ms <= upper_bound:
+                self.buckets[index] += 1
+                break
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum_ms': round(self.sum, 3),
+            'buckets_ms': {str(upper_bound): count for upper_bound, count in zip(DURATION_BUCKETS_MS, self.buckets)}
+        }
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context() and '_profile' in g:
+        context._profile_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_time = getattr(context, '_profile_start_time', None)
+    if start_time is not None and has_app_context() and '_profile' in g:
+        g._profile['sql'] += time.perf_counter() - start_time
+        g._profile['queries'] += 1
+
+
+class Profiler:
+    """Development tool - per endpoint timings of SQL, schema dump and JSON encoding phases.
+
+    Enabled by PROFILING config option. Responses get Server-Timing header and request with
+    X-Profile header equal to PROFILING_SECRET is run under cProfile, stats are written to PROFILING_DIR.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        if not app.config.get('PROFILING', False):
+            return
+        app.extensions['profiler'] = {
+            'histograms': defaultdict(lambda: {phase: Histogram() for phase in PHASES}),
+            'queries': defaultdict(int),
+            'lock': Lock()
+        }
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.json_encoder = self._timed_encoder(app.json_encoder)
+        # listen on all engines, so replica queries are counted too
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def _timed_encoder(self, encoder_class: type) -> type:
+        profiler = self
+
+        def encode(encoder, o) -> str:
+            with profiler.phase('encode'):
+                return encoder_class.encode(encoder, o)
+
+        return type(f'Timed{encoder_class.__name__}', (encoder_class,), {'encode': encode})
+
+    @staticmethod
+    @contextmanager
+    def phase(name: str):
+        if not has_app_context() or '_profile' not in g:
+            yield
+            return
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            g._profile[name] += time.perf_counter() - start_time
+
+    @staticmethod
+    def _before_request() -> None:
+        g._profile = defaultdict(float, start_time=time.perf_counter())
+        # any client could fill the disk with .prof files - only holders of the secret are profiled
+        secret = current_app.config.get('PROFILING_SECRET')
+        if secret and hmac.compare_digest(request.headers.get('X-Profile', ''), secret):
+            g._profile_cprofile = cProfile.Profile()
+            g._profile_cprofile.enable()
+
+    @staticmethod
+    def _after_request(response: Response) -> Response:
+        timings = g.pop('_profile', None)
+        if timings is None:
+            return response
+        timings['total'] = time.perf_counter() - timings['start_time']
+        endpoint = request.endpoint or 'unknown'
+
+        profile = g.pop('_profile_cprofile', None)
+        if profile is not None:
+            profile.disable()
+            profile_dir = Path(current_app.config.get('PROFILING_DIR') or Path(current_app.instance_path, 'profiles'))
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            profile_file = profile_dir / f'{endpoint}-{time.time_ns()}.prof'
+            profile.dump_stats(profile_file)
+            response.headers['X-Profile-File'] = str(profile_file)
+
+        state = current_app.extensions['profiler']
+        with state['lock']:
+            histograms = state['histograms'][endpoint]
+            for phase in PHASES:
+                histograms[phase].observe(timings[phase] * 1000)
+            state['queries'][endpoint] += int(timings['queries'])
+
+        if current_app.config.get('PROFILING_SERVER_TIMING', True):
+            response.headers['Server-Timing'] = ', '.join(
+                [f'{phase};dur={timings[phase] * 1000:.2f}' for phase in PHASES] +
+                [f'queries;desc="{int(timings["queries"])}"']
+            )
+        return response
+
+    @staticmethod
+    def report() -> dict:
+        state = current_app.extensions.get('profiler')
+        if state is None:
+            return {'enabled': False}
+        with state['lock']:
+            endpoints = {
+                endpoint: {
+                    'queries': state['queries'][endpoint],
+                    **{phase: histogram.to_dict() for phase, histogram in histograms.items()}
+                }
+                for endpoint, histograms in state['histograms'].items()
+            }
+        return {'enabled': True, 'endpoints': endpoints}
+
+    @staticmethod
+    def prometheus_report() -> str:
+        state = current_app.extensions.get('profiler')
+        lines = [
+            '# HELP api_request_phase_seconds Time spent in request phase.',
+            '# TYPE api_request_phase_seconds histogram'
+        ]
+        if state is None:
+            return '\n'.join(lines) + '\n'
+        with state['lock']:
+            for endpoint, histograms in state['histograms'].items():
+                for phase, histogram in histograms.items():
+                    labels = f'endpoint="{endpoint}",phase="{phase}"'
+                    cumulative = 0
+                    for upper_bound, count in zip(DURATION_BUCKETS_MS, histogram.buckets):
+                        cumulative += count
+                        le = '+Inf' if upper_bound == float('inf') else f'{upper_bound / 1000:g}'
+                        lines.append(f'api_request_phase_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                    lines.append(f'api_request_phase_seconds_sum{{{labels}}} {histogram.sum / 1000:.6f}')
+                    lines.append(f'api_request_phase_seconds_count{{{labels}}} {histogram.count}')
+            lines.append('# HELP api_request_queries_total SQL statements executed by endpoint.')
+            lines.append('# TYPE api_request_queries_total counter')
+            for endpoint, count in state['queries'].items():
+                lines.append(f'api_request_queries_total{{endpoint="{endpoint}"}} {count}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,107 @@
+import math
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Tuple
+
+from flask import Flask, current_app, request
+from werkzeug.exceptions import TooManyRequests
+
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_limit(limit: str) -> Tuple[int, float]:
+    """'10/minute' -> (bucket capacity 10, refill rate 10 / 60 tokens per second)."""
+    count, _, period = limit.partition('/')
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period.strip()]
+
+
+class RateLimitBackend:
+    """Token buckets storage. Multi-process deployments need a backend on a shared store (e.g. redis),
+    which implements consume() atomically and passes it to RateLimiter.init_app.
+    """
+
+    def consume(self, key: str, capacity: int, rate: float, cost: int = 1) -> float:
+        """Take cost tokens from bucket key, return 0 when allowed or seconds until enough tokens refill."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = Lock()
+
+    def consume(self, key: str, capacity: int, rate: float, cost: int = 1) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            # least recently used bucket is dropped, which only makes it full again
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+rate_limit_backends = {
+    'memory': lambda app: MemoryRateLimitBackend(app.config.get('RATELIMIT_MAX_KEYS', 10000))
+}
+
+
+class RateLimiter:
+    """Token bucket rate limiting of every request, keyed on user id from the bearer token or on client IP.
+
+    RATELIMIT_LIMITS maps endpoint ('auth.login') or blueprint ('auth') to limit like '10/minute',
+    None disables limiting. Other endpoints use RATELIMIT_DEFAULT.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask, backend: Optional[RateLimitBackend] = None) -> None:
+        if backend is None:
+            backend = rate_limit_backends[app.config.get('RATELIMIT_BACKEND', 'memory')](app)
+        app.extensions['rate_limiter'] = {'backend': backend}
+        app.before_request(self._check_limit)
+
+    @staticmethod
+    def _get_limit(endpoint: str) -> Tuple[str, Optional[str]]:
+        limits = current_app.config.get('RATELIMIT_LIMITS', {})
+        for scope in (endpoint, endpoint.rpartition('.')[0]):
+            if scope in limits:
+                return scope, limits[scope]
+        return 'default', current_app.config.get('RATELIMIT_DEFAULT')
+
+    @staticmethod
+    def _get_identity() -> str:
+        from book_library_api.utils import get_request_user_id
+        user_id = get_request_user_id()
+        return f'user:{user_id}' if user_id is not None else f'ip:{request.remote_addr}'
+
+    def _check_limit(self) -> None:
+        if not current_app.config.get('RATELIMIT_ENABLED', True) or request.endpoint is None:
+            return
+        scope, limit = self._get_limit(request.endpoint)
+        if not limit:
+            return
+        capacity, rate = parse_limit(limit)
+        backend = current_app.extensions['rate_limiter']['backend']
+        wait = backend.consume(f'{scope}:{self._get_identity()}', capacity, rate)
+        if wait:
+            raise TooManyRequests('Too many requests. Please try again later', retry_after=math.ceil(wait))
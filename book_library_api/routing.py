@@ -0,0 +1,86 @@
+import itertools
+import time
+from threading import Lock
+from typing import Optional
+
+from flask import Flask, g, has_request_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import exc, orm
+from sqlalchemy.engine import Engine
+
+
+class ReplicaRouter:
+    """Registers SQLALCHEMY_REPLICA_URIS as replica_<n> binds and picks one of them round-robin.
+
+    Replica which fails to connect is skipped for REPLICA_RETRY_SECONDS, when none is available
+    reads go to primary.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        keys = []
+        for index, uri in enumerate(app.config.get('SQLALCHEMY_REPLICA_URIS') or []):
+            keys.append(f'replica_{index}')
+            binds[keys[-1]] = uri
+        app.config['SQLALCHEMY_BINDS'] = binds or None
+        app.extensions['replica_router'] = {
+            'keys': keys,
+            'counter': itertools.count(),
+            'unavailable_until': {},
+            'lock': Lock()
+        }
+
+    @staticmethod
+    def get_engine(db: SQLAlchemy, app: Flask) -> Optional[Engine]:
+        state = app.extensions.get('replica_router')
+        if not state or not state['keys']:
+            return None
+        keys = state['keys']
+        start = next(state['counter'])
+        for offset in range(len(keys)):
+            key = keys[(start + offset) % len(keys)]
+            if state['unavailable_until'].get(key, 0) > time.monotonic():
+                continue
+            engine = db.get_engine(app, bind=key)
+            try:
+                engine.connect().close()
+            except exc.DBAPIError:
+                with state['lock']:
+                    state['unavailable_until'][key] = time.monotonic() + app.config.get('REPLICA_RETRY_SECONDS', 30)
+                continue
+            return engine
+        return None
+
+
+class RoutingSession(SignallingSession):
+    """Session used in view functions marked read_only reads from a replica.
+
+    One replica is used for the whole request and once session flushes
+    it stays on primary, so the request reads its own writes.
+    """
+
+    def __init__(self, db, autocommit=False, autoflush=True, **options):
+        self.db = db
+        self.use_primary = False
+        self.replica_engine = None
+        super().__init__(db, autocommit=autocommit, autoflush=autoflush, **options)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing:
+            self.use_primary = True
+        if not self.use_primary and has_request_context() and g.get('read_only'):
+            if self.replica_engine is None:
+                self.replica_engine = ReplicaRouter.get_engine(self.db, self.app)
+                self.use_primary = self.replica_engine is None
+            if self.replica_engine is not None:
+                return self.replica_engine
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
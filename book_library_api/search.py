@@ -0,0 +1,90 @@
+import re
+from collections import defaultdict
+from threading import Lock
+from typing import List, Tuple
+
+from flask import request, current_app
+from flask_sqlalchemy import BaseQuery, Pagination
+from sqlalchemy import func, literal_column
+from book_library_api import db
+from book_library_api.models import Book, TableVersion
+from book_library_api.utils import get_limit, get_pagination, get_pagination_links
+
+
+# generated column and GIN index are created by migration on postgresql only
+SEARCH_CONFIG = 'english'
+SEARCH_VECTOR = literal_column('book.search_vector')
+WORD_RE = re.compile(r'\w+')
+TITLE_WEIGHT = 4
+DESCRIPTION_WEIGHT = 1
+
+
+def _tokenize(text: str) -> List[str]:
+    return WORD_RE.findall(text.lower()) if text else []
+
+
+class InvertedIndex:
+    """In-process fallback for databases without full text search (sqlite in tests and development).
+
+    Index is rebuilt from book table when its version in table_versions changes.
+    """
+
+    def __init__(self):
+        self.version = -1
+        self.postings = {}
+        self._lock = Lock()
+
+    def _build(self) -> None:
+        postings = defaultdict(lambda: defaultdict(int))
+        rows = db.session.query(Book.id, Book.title, Book.description).yield_per(1000)
+        for book_id, title, description in rows:
+            for token in _tokenize(title):
+                postings[token][book_id] += TITLE_WEIGHT
+            for token in _tokenize(description):
+                postings[token][book_id] += DESCRIPTION_WEIGHT
+        self.postings = postings
+
+    def refresh(self) -> None:
+        version = db.session.query(TableVersion.version) \
+            .filter(TableVersion.table_name == Book.__tablename__).scalar()
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self._build()
+                    self.version = version
+
+    def search(self, q: str) -> List[int]:
+        # every word has to match, same as websearch_to_tsquery on postgresql
+        scores = None
+        for token in set(_tokenize(q)):
+            token_scores = self.postings.get(token, {})
+            if scores is None:
+                scores = dict(token_scores)
+            else:
+                scores = {book_id: score + token_scores[book_id]
+                          for book_id, score in scores.items() if book_id in token_scores}
+        return sorted(scores or {}, key=lambda book_id: (-scores[book_id], book_id))
+
+
+def _get_index() -> InvertedIndex:
+    index = current_app.extensions.setdefault('search_index', InvertedIndex())
+    index.refresh()
+    return index
+
+
+def get_search_pagination(query: BaseQuery, q: str, func_name: str) -> Tuple[list, dict]:
+    """Paginate books matching q, best ranked first."""
+    if db.engine.dialect.name == 'postgresql':
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        query = query.filter(SEARCH_VECTOR.op('@@')(ts_query)) \
+            .order_by(func.ts_rank_cd(SEARCH_VECTOR, ts_query).desc(), Book.id)
+        return get_pagination(query, func_name)
+
+    book_ids = _get_index().search(q)
+    page = max(request.args.get('page', 1, type=int), 1)
+    limit = get_limit() or current_app.config.get('PER_PAGE', 5)
+    page_ids = book_ids[(page - 1) * limit:page * limit]
+    positions = {book_id: position for position, book_id in enumerate(page_ids)}
+    items = sorted(query.filter(Book.id.in_(page_ids)).all(), key=lambda book: positions[book.id])
+    paginate_obj = Pagination(None, page, limit, len(book_ids), items)
+    return items, get_pagination_links(paginate_obj, func_name)
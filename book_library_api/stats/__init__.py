@@ -0,0 +1,6 @@
+from flask import Blueprint
+
+stats_bp = Blueprint('stats', __name__)
+
+
+from book_library_api.stats import stats
@@ -0,0 +1,121 @@
+from flask import jsonify
+from sqlalchemy import Integer, case, cast, func, literal
+from book_library_api import db, response_cache
+from book_library_api.models import Author, Book
+from book_library_api.stats import stats_bp
+from book_library_api.utils import read_only, conditional_get, apply_filter, get_limit
+
+
+# lower bounds of number_of_pages facet ranges
+PAGES_RANGES = (0, 100, 200, 300, 500, 1000)
+
+
+def _round(value):
+    return round(float(value), 2) if value is not None else None
+
+
+def _pages_range_expression():
+    whens = [(Book.number_of_pages >= lower_bound, literal(lower_bound)) for lower_bound in reversed(PAGES_RANGES[1:])]
+    return case(whens, else_=literal(PAGES_RANGES[0]))
+
+
+def _pages_range_label(lower_bound: int) -> str:
+    index = PAGES_RANGES.index(lower_bound)
+    if index + 1 < len(PAGES_RANGES):
+        return f'{lower_bound}-{PAGES_RANGES[index + 1] - 1}'
+    return f'{lower_bound}+'
+
+
+@stats_bp.route('/stats/books', methods=['GET'])
+@read_only
+@conditional_get
+@response_cache.cached
+def get_books_stats():
+    query = db.session.query(func.count(Book.id), func.min(Book.number_of_pages), func.max(Book.number_of_pages),
+                             func.avg(Book.number_of_pages))
+    count, min_pages, max_pages, avg_pages = apply_filter(Book, query).one()
+    return jsonify({
+        'success': True,
+        'data': {
+            'count': count,
+            'min_number_of_pages': min_pages,
+            'max_number_of_pages': max_pages,
+            'avg_number_of_pages': _round(avg_pages)
+        }
+    })
+
+
+@stats_bp.route('/stats/authors', methods=['GET'])
+@read_only
+@conditional_get
+@response_cache.cached
+def get_authors_stats():
+    books_count = func.count(Book.id).label('books_count')
+    query = db.session.query(Author.id, Author.first_name, Author.last_name, books_count,
+                             func.min(Book.number_of_pages), func.max(Book.number_of_pages),
+                             func.avg(Book.number_of_pages)) \
+        .join(Book, Book.author_id == Author.id)
+    query = apply_filter(Book, query) \
+        .group_by(Author.id, Author.first_name, Author.last_name) \
+        .order_by(books_count.desc(), Author.id) \
+        .limit(get_limit())
+    items = [{
+        'id': author_id,
+        'first_name': first_name,
+        'last_name': last_name,
+        'books_count': count,
+        'min_number_of_pages': min_pages,
+        'max_number_of_pages': max_pages,
+        'avg_number_of_pages': _round(avg_pages)
+    } for author_id, first_name, last_name, count, min_pages, max_pages, avg_pages in query]
+    return jsonify({
+        'success': True,
+        'data': items,
+        'number_of_records': len(items)
+    })
+
+
+@stats_bp.route('/stats/authors/decades', methods=['GET'])
+@read_only
+@conditional_get
+@response_cache.cached
+def get_authors_decades_stats():
+    decade = (cast(func.extract('year', Author.birth_date), Integer) / 10 * 10).label('decade')
+    query = db.session.query(decade, func.count(func.distinct(Author.id)), func.count(Book.id)) \
+        .outerjoin(Book, Book.author_id == Author.id)
+    query = apply_filter(Author, query).group_by(decade).order_by(decade)
+    items = [{'decade': value, 'authors_count': authors_count, 'books_count': count}
+             for value, authors_count, count in query]
+    return jsonify({
+        'success': True,
+        'data': items,
+        'number_of_records': len(items)
+    })
+
+
+@stats_bp.route('/stats/books/facets', methods=['GET'])
+@read_only
+@conditional_get
+@response_cache.cached
+def get_books_facets():
+    # counts for the same filters /books accepts, e.g. ?number_of_pages[gte]=300
+    authors_query = db.session.query(Author.id, Author.first_name, Author.last_name, func.count(Book.id)) \
+        .join(Book, Book.author_id == Author.id)
+    authors_query = apply_filter(Book, authors_query) \
+        .group_by(Author.id, Author.first_name, Author.last_name) \
+        .order_by(func.count(Book.id).desc(), Author.id)
+
+    pages_range = _pages_range_expression().label('pages_range')
+    pages_query = apply_filter(Book, db.session.query(pages_range, func.count(Book.id))) \
+        .group_by(pages_range) \
+        .order_by(pages_range)
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'author': [{'id': author_id, 'first_name': first_name, 'last_name': last_name, 'count': count}
+                       for author_id, first_name, last_name, count in authors_query],
+            'number_of_pages': [{'range': _pages_range_label(lower_bound), 'count': count}
+                                for lower_bound, count in pages_query]
+        }
+    })
@@ -0,0 +1,60 @@
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Optional
+
+from flask import Flask, current_app
+
+
+class BackgroundTasks:
+    """Runs long writes (e.g. deleting an author with many books) outside of the request on a small
+    pool of threads. Job status is kept in process memory for the last BACKGROUND_MAX_JOBS jobs.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        app.extensions['background_tasks'] = {
+            'executor': ThreadPoolExecutor(max_workers=app.config.get('BACKGROUND_WORKERS', 2),
+                                           thread_name_prefix='background'),
+            'jobs': OrderedDict(),
+            'lock': Lock()
+        }
+
+    @staticmethod
+    def _set_status(state: dict, job_id: str, **status) -> None:
+        with state['lock']:
+            state['jobs'][job_id].update(status)
+
+    def submit(self, name: str, func, *args, user_id: Optional[int] = None) -> str:
+        app = current_app._get_current_object()
+        state = app.extensions['background_tasks']
+        job_id = uuid.uuid4().hex
+        with state['lock']:
+            state['jobs'][job_id] = {'id': job_id, 'name': name, 'status': 'pending', 'user_id': user_id}
+            while len(state['jobs']) > app.config.get('BACKGROUND_MAX_JOBS', 1000):
+                state['jobs'].popitem(last=False)
+
+        def run() -> None:
+            with app.app_context():
+                self._set_status(state, job_id, status='running')
+                try:
+                    result = func(*args)
+                except Exception as error:
+                    app.logger.exception('Background job %s failed', name)
+                    self._set_status(state, job_id, status='failed', error=str(error))
+                else:
+                    self._set_status(state, job_id, status='done', result=result)
+
+        state['executor'].submit(run)
+        return job_id
+
+    @staticmethod
+    def get_status(job_id: str) -> Optional[dict]:
+        state = current_app.extensions['background_tasks']
+        with state['lock']:
+            job = state['jobs'].get(job_id)
+            return dict(job) if job is not None else None
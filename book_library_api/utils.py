@@ -1,18 +1,33 @@
 # validate whether header is in json
 import jwt
+import operator
 import re
-from flask import request, url_for, current_app
-from flask_sqlalchemy import DefaultMeta, BaseQuery
+import json
+import base64
+import binascii
+import hashlib
+import time
+from collections import Counter
+from flask import request, url_for, current_app, jsonify, Response, g
+from flask_sqlalchemy import DefaultMeta, BaseQuery, Pagination
 from werkzeug.exceptions import UnsupportedMediaType, abort
-from functools import wraps
+from functools import wraps, lru_cache
+from sqlalchemy.orm import joinedload, selectinload, load_only
 from sqlalchemy.orm.attributes import InstrumentedAttribute
-from sqlalchemy.sql.expression import BinaryExpression
-from datetime import datetime
+from sqlalchemy.sql.expression import BooleanClauseList, and_, or_
+from datetime import datetime, date, timezone
 from werkzeug.datastructures import ImmutableDict
-from typing import Tuple
+from typing import Tuple, List, Optional, Mapping, Callable, Dict
+from marshmallow import Schema, ValidationError
+from sqlalchemy import text
+from book_library_api import db, response_cache, index_advisor
+from book_library_api.models import TableVersion, VERSIONED_TABLES, Author, Book, User
 
 
 COMPARISON_OPERATOR_RE = re.compile(r'(.*)\[(gte|gt|lte|lt)\]')
+FILTER_OPERATORS = {'==': operator.eq, 'gte': operator.ge, 'gt': operator.gt, 'lte': operator.le, 'lt': operator.lt}
+# query string params which are never treated as filters
+RESERVED_PARAMS = {'fields', 'sort', 'page', 'limit', 'cursor', 'count', 'q'}
 
 
 def validation_json_content_type(func):
@@ -25,6 +40,30 @@ def validation_json_content_type(func):
     return wrapper
 
 
+def _decode_token(token: str) -> dict:
+    # verified payloads are cached by token digest, never longer than token is valid
+    token_cache = current_app.extensions['token_cache']
+    key = hashlib.sha256(token.encode()).hexdigest()
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(jwt=token, key=current_app.config.get('SECRET_KEY'), algorithms='HS256')
+        ttl = min(current_app.config.get('JWT_CACHE_TTL', 60), payload['exp'] - time.time())
+        if ttl > 0:
+            token_cache.set(key, payload, ttl)
+    return payload
+
+
+def get_request_user_id() -> Optional[int]:
+    # user id from a valid bearer token, None when the request is anonymous
+    _, _, token = request.headers.get('Authorization', '').partition(' ')
+    if not token:
+        return None
+    try:
+        return _decode_token(token)['user_id']
+    except jwt.InvalidTokenError:
+        return None
+
+
 def token_required(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
@@ -35,8 +74,7 @@ def token_required(func):
         if token is None:
             abort(401, 'Missing token. Please login or register')
         try:
-            payload = jwt.decode(jwt=token, key=current_app.config.get('SECRET_KEY'), algorithms='HS256')
-            print(payload)
+            payload = _decode_token(token)
         except jwt.ExpiredSignatureError:
             abort(401, 'Expired token. Please login or register')
         except jwt.InvalidTokenError:
@@ -46,73 +84,561 @@ def token_required(func):
     return wrapper
 
 
+def load_current_user(user_id: int) -> User:
+    # loaded at most once per request
+    if 'current_user' not in g:
+        g.current_user = User.query.get_or_404(user_id, description=f'User with id {user_id} not found!')
+    return g.current_user
+
+
+def is_admin(user_id: int) -> bool:
+    # any registered user has a token, admins are users with username listed in ADMIN_USERS
+    return load_current_user(user_id).username in current_app.config.get('ADMIN_USERS', [])
+
+
+def admin_required(func):
+    @wraps(func)
+    def wrapper(user_id: int, *args, **kwargs):
+        if not is_admin(user_id):
+            abort(403, 'Admin permissions required')
+        return func(user_id, *args, **kwargs)
+    return token_required(wrapper)
+
+
+def get_etag() -> Tuple[str, Optional[datetime]]:
+    # every book/author list embeds data of both tables, so any write changes all collection ETags
+    versions = sorted(db.session.query(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)
+                      .filter(TableVersion.table_name.in_(VERSIONED_TABLES)))
+    g.table_versions = tuple((name, version) for name, version, _ in versions)
+    etag_source = response_cache.make_key() + '|' + ','.join(f'{name}:{version}' for name, version, _ in versions)
+    last_modified = max((updated_at for _, _, updated_at in versions), default=None)
+    return hashlib.sha1(etag_source.encode()).hexdigest(), last_modified
+
+
+def get_resource_etag(model: DefaultMeta, resource_id: int, lock: bool = False) -> Optional[str]:
+    """ETag of single book or author from row versions of the resource and of rows embedded in it (author of
+    book, books of author) - writes of other resources do not change it. None when the resource does not exist.
+    """
+    query = db.session.query(model.version)
+    for relationship in model.__mapper__.relationships:
+        related = relationship.mapper.class_
+        query = query.add_columns(related.id, related.version).outerjoin(getattr(model, relationship.key))
+    query = query.filter(model.id == resource_id)
+    if lock:
+        # only the resource row is locked, concurrent writes of other resources go on
+        query = query.with_for_update(of=model)
+    rows = query.all()
+    if not rows:
+        return None
+    etag_source = f'{model.__tablename__}:{resource_id}|' + ','.join(sorted(':'.join(map(str, row)) for row in rows))
+    return hashlib.sha1(etag_source.encode()).hexdigest()
+
+
+def get_table_versions() -> tuple:
+    if 'table_versions' not in g:
+        rows = db.session.query(TableVersion.table_name, TableVersion.version) \
+            .filter(TableVersion.table_name.in_(VERSIONED_TABLES))
+        g.table_versions = tuple(sorted((name, version) for name, version in rows))
+    return g.table_versions
+
+
+def read_only(func):
+    """Mark view which only reads data - its queries are sent to a replica when one is configured."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        g.read_only = True
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def _conditional_response(etag: str, last_modified: Optional[datetime], func, args, kwargs) -> Response:
+    g.etag = etag
+    if last_modified is not None:
+        last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        not_modified = last_modified is not None and request.if_modified_since is not None \
+            and last_modified <= request.if_modified_since
+    if not_modified:
+        # skip the query and serialization entirely
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.make_response(func(*args, **kwargs))
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+def conditional_get(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        etag, last_modified = get_etag()
+        return _conditional_response(etag, last_modified, func, args, kwargs)
+    return wrapper
+
+
+def conditional_get_resource(model: DefaultMeta):
+    """Conditional GET of single resource, identified by the only view argument."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            resource_id, = kwargs.values()
+            etag = get_resource_etag(model, resource_id)
+            if etag is None:
+                # view answers 404
+                return func(*args, **kwargs)
+            return _conditional_response(etag, None, func, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def check_if_match(model: DefaultMeta):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if request.if_match:
+                # the resource row stays locked until commit, so conditional writers of it are serialized
+                etag = get_resource_etag(model, kwargs[f'{model.__name__.lower()}_id'], lock=True)
+                if etag is not None and not request.if_match.contains(etag):
+                    abort(412, 'Resource has been modified. Please fetch it again')
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, '%d-%m-%Y').date()
+
+
+# query string values are converted to python type of the column, dates use the same format as schemas
+VALUE_PARSERS = {int: int, str: str, date: _parse_date}
+
+
+@lru_cache(maxsize=None)
+def get_query_columns(model: DefaultMeta) -> Dict[str, Tuple[InstrumentedAttribute, Callable]]:
+    """Whitelist of columns which can be used in filters, sort and fields, with parser of their values."""
+    columns = {}
+    for column in model.__table__.columns:
+        if column.info.get('internal'):
+            continue
+        try:
+            parser = VALUE_PARSERS.get(column.type.python_type)
+        except NotImplementedError:
+            parser = None
+        if parser is not None:
+            columns[column.key] = (getattr(model, column.key), parser)
+    return columns
+
+
+@lru_cache(maxsize=256)
+def _get_fields_plan(model: DefaultMeta, fields: str) -> tuple:
+    return tuple(field for field in fields.split(',')
+                 if field in get_query_columns(model) or field in model.__mapper__.relationships)
+
+
 def get_schema_args(model: DefaultMeta) -> dict:
     schema_args = {'many': True}
     fields = request.args.get('fields')
     if fields:
-        schema_args['only'] = [field for field in fields.split(',') if field in model.__table__.columns]
+        schema_args['only'] = list(_get_fields_plan(model, fields))
     return schema_args
 
 
-def apply_order(model: DefaultMeta, query: BaseQuery) -> BaseQuery:
-    sort_keys = request.args.get('sort')
-    if sort_keys:
-        for key in sort_keys.split(','):
-            desc = False
-            if key.startswith('-'):
-                desc = True
-                key = key[1:]
-            column_attr = getattr(model, key, None)
-            if column_attr is not None:
-                query = query.order_by(column_attr.desc()) if desc else query.order_by(column_attr)
+@lru_cache(maxsize=256)
+def _get_cached_schema(schema_class: type, many: bool, only: Optional[tuple], exclude: tuple) -> Schema:
+    return schema_class(many=many, only=only, exclude=exclude)
+
+
+def get_schema(schema_class: type, many: bool = False, only: Optional[list] = None, exclude: tuple = ()) -> Schema:
+    """Return shared schema instance - building a schema (and its nested schemas) costs more than small dumps."""
+    return _get_cached_schema(schema_class, many, tuple(sorted(set(only))) if only is not None else None,
+                              tuple(sorted(exclude)))
+
+
+def get_loader_options(model: DefaultMeta, only: Optional[list] = None) -> list:
+    options = []
+    if only is not None:
+        # push the fields projection down to SQL - unrequested columns (e.g. book.description) are not selected
+        column_names = set(model.__table__.primary_key.columns.keys())
+        column_names.update(field for field in only if field in model.__table__.columns)
+        # cursor pagination reads sort keys from loaded rows
+        column_names.update(column_attr.key for column_attr, _ in _get_sort_keys(model))
+        for relationship in model.__mapper__.relationships:
+            if relationship.key in only:
+                column_names.update(column.key for column in relationship.local_columns)
+        options.append(load_only(*column_names))
+
+    # eager load only relationships which will be serialized - avoid N+1 lazy loads during dump
+    for relationship in model.__mapper__.relationships:
+        if only is None or relationship.key in only:
+            # collections use a second IN query, so LIMIT is still applied to parent rows
+            loader = selectinload if relationship.uselist else joinedload
+            options.append(loader(getattr(model, relationship.key)))
+    return options
+
+
+@lru_cache(maxsize=256)
+def _get_sort_plan(model: DefaultMeta, sort_param: str) -> Tuple[Tuple[InstrumentedAttribute, bool], ...]:
+    columns = get_query_columns(model)
+    sort_keys = []
+    for key in sort_param.split(','):
+        desc = key.startswith('-')
+        key = key[1:] if desc else key
+        if key in columns:
+            sort_keys.append((columns[key][0], desc))
+    return tuple(sort_keys)
+
+
+def _get_sort_keys(model: DefaultMeta, args: Optional[Mapping] = None) -> List[Tuple[InstrumentedAttribute, bool]]:
+    args = request.args if args is None else args
+    sort_param = args.get('sort')
+    return list(_get_sort_plan(model, sort_param)) if sort_param else []
+
+
+def apply_order(model: DefaultMeta, query: BaseQuery, args: Optional[Mapping] = None) -> BaseQuery:
+    # args default to request query string, CLI commands pass own mapping
+    for column_attr, desc in _get_sort_keys(model, args):
+        index_advisor.record_usage(model, column_attr.key, 'sort')
+        query = query.order_by(column_attr.desc()) if desc else query.order_by(column_attr)
     return query
 
 
-def _get_filter_argument(column_name: InstrumentedAttribute, value: str, operator: str) -> BinaryExpression:
-    operator_mapping = {
-        '==': column_name == value,
-        'gte': column_name >= value,
-        'gt': column_name > value,
-        'lte': column_name <= value,
-        'lt': column_name < value
-    }
-    return operator_mapping[operator]
-
-
-def apply_filter(model: DefaultMeta, query: BaseQuery) -> BaseQuery:
-    for param, value in request.args.items():
-        if param not in {'fields', 'sort', 'page', 'limit'}:
-            operator = "=="
-            match = COMPARISON_OPERATOR_RE.match(param)
-            if match is not None:
-                param, operator = match.groups()
-            column_attr = getattr(model, param, None)
-            if column_attr is not None:
-                # polymorphism -- all class should have this method
-                value = model.additional_validation(param, value)
-                if value is None:
-                    continue
-                filter_argument = _get_filter_argument(column_attr, value, operator)
-                query = query.filter(filter_argument)
+@lru_cache(maxsize=256)
+def _get_filter_plan(model: DefaultMeta, params: tuple) -> Tuple[tuple, ...]:
+    """Filters for sorted query string keys - the same filters give the same SQL statement whatever the order of
+    params, so SQLAlchemy compiled statement cache is reused."""
+    columns = get_query_columns(model)
+    plan = []
+    for param in params:
+        if param in RESERVED_PARAMS:
+            continue
+        column_name, operator_name = param, '=='
+        match = COMPARISON_OPERATOR_RE.match(param)
+        if match is not None:
+            column_name, operator_name = match.groups()
+        if column_name in columns:
+            column_attr, parser = columns[column_name]
+            plan.append((param, column_attr, FILTER_OPERATORS[operator_name], parser))
+    return tuple(plan)
+
+
+def apply_filter(model: DefaultMeta, query: BaseQuery, args: Optional[Mapping] = None) -> BaseQuery:
+    args = request.args if args is None else args
+    for param, column_attr, compare, parser in _get_filter_plan(model, tuple(sorted(args.keys()))):
+        try:
+            value = parser(args[param])
+        except ValueError:
+            # value of wrong type (e.g. invalid date) is ignored like unknown param
+            continue
+        index_advisor.record_usage(model, column_attr.key, 'filter')
+        query = query.filter(compare(column_attr, value))
     return query
 
 
+def get_total(query: BaseQuery) -> Tuple[int, str]:
+    """Return number of rows matching query and whether it is 'exact' or 'estimated'.
+
+    count=estimate gives planner statistics for unfiltered lists on postgresql. Exact counts
+    are cached per statement until a versioned table changes.
+    """
+    query = query.order_by(None)
+    if request.args.get('count', '').lower() == 'estimate' and query.whereclause is None \
+            and db.engine.dialect.name == 'postgresql':
+        table_name = query.column_descriptions[0]['entity'].__tablename__
+        estimate = db.session.execute(text('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)'),
+                                      {'name': table_name}).scalar()
+        # -1 means the table has not been analyzed yet
+        if estimate is not None and estimate >= 0:
+            return estimate, 'estimated'
+
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    key = f'{compiled}|{sorted(compiled.params.items())}'
+    versions = get_table_versions()
+    count_cache = current_app.extensions['count_cache']
+    cached = count_cache.get(key)
+    if cached is not None and cached[0] == versions:
+        return cached[1], 'exact'
+    total = query.count()
+    count_cache.set(key, (versions, total), current_app.config.get('COUNT_CACHE_TTL', 300))
+    return total, 'exact'
+
+
+def get_limit() -> int:
+    per_page = current_app.config.get('PER_PAGE', 5)
+    limit = request.args.get('limit', per_page, type=int)
+    if limit < 0:
+        limit = per_page
+    return min(limit, current_app.config.get('MAX_PER_PAGE', 100))
+
+
 def get_pagination(query: BaseQuery, func_name: str) -> Tuple[list, dict]:
-    page = request.args.get('page', 1, type=int)
-    limit = request.args.get('limit', current_app.config.get('PER_PAGE', 5), type=int)
-    params = {key: value for key, value in request.args.items() if key != 'page'}
-    paginate_obj = query.paginate(page, limit, False)
+    page = max(request.args.get('page', 1, type=int), 1)
+    limit = get_limit()
+    query = query.offset((page - 1) * limit)
+
+    if request.args.get('count', '').lower() == 'false':
+        # one extra row tells whether there is a next page
+        items = query.limit(limit + 1).all()
+        paginate_obj = Pagination(None, page, limit, None, items[:limit])
+        return paginate_obj.items, get_pagination_links(paginate_obj, func_name, has_next=len(items) > limit)
+
+    items = query.limit(limit).all()
+    total, count_type = get_total(query.offset(None))
+    paginate_obj = Pagination(None, page, limit, total, items)
+    return paginate_obj.items, get_pagination_links(paginate_obj, func_name, count_type)
+
 
+def get_pagination_links(paginate_obj: Pagination, func_name: str, count_type: str = 'exact',
+                         has_next: Optional[bool] = None) -> dict:
+    page = paginate_obj.page
+    params = {key: value for key, value in request.args.items() if key != 'page'}
     pagination = {
-        'total_pages': paginate_obj.pages,
-        'total_records': paginate_obj.total,
         'current_page': url_for(func_name, page=page, **params)
     }
+    if paginate_obj.total is not None:
+        pagination.update({
+            'total_pages': paginate_obj.pages,
+            'total_records': paginate_obj.total,
+            'count_type': count_type
+        })
+        has_next = paginate_obj.has_next
 
-    if paginate_obj.has_next:
+    if has_next:
         pagination['next_page'] = url_for(func_name, page=page + 1, **params)
 
     if paginate_obj.has_prev:
         pagination['previous_page'] = url_for(func_name, page=page - 1, **params)
 
-    return paginate_obj.items, pagination
+    return pagination
+
+
+def _encode_cursor(values: list, backwards: bool) -> str:
+    values = [value.isoformat() if isinstance(value, date) else value for value in values]
+    data = json.dumps({'values': values, 'backwards': backwards}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def _decode_cursor(cursor: str, sort_keys: List[Tuple[InstrumentedAttribute, bool]]) -> Tuple[list, bool]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        values, backwards = data['values'], bool(data['backwards'])
+        if len(values) != len(sort_keys):
+            raise ValueError
+        for index, (column_attr, _) in enumerate(sort_keys):
+            python_type = column_attr.property.columns[0].type.python_type
+            value = values[index]
+            if issubclass(python_type, date):
+                value = python_type.fromisoformat(value)
+            # values go straight into the seek expression, so they must have the column type
+            if isinstance(value, bool) or not isinstance(value, python_type):
+                raise ValueError
+            values[index] = value
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        abort(400, 'Invalid cursor')
+    return values, backwards
+
+
+def _get_seek_expression(sort_keys: List[Tuple[InstrumentedAttribute, bool]], values: list,
+                         backwards: bool) -> BooleanClauseList:
+    # (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... - works for mixed asc/desc keys
+    clauses = []
+    for index, (column_attr, desc) in enumerate(sort_keys):
+        if desc == backwards:
+            comparison = column_attr > values[index]
+        else:
+            comparison = column_attr < values[index]
+        equalities = [key == value for (key, _), value in zip(sort_keys[:index], values[:index])]
+        clauses.append(and_(*equalities, comparison))
+    return or_(*clauses)
+
+
+def get_cursor_pagination(model: DefaultMeta, query: BaseQuery, func_name: str) -> Tuple[list, dict]:
+    limit = get_limit()
+    cursor = request.args.get('cursor')
+    params = {key: value for key, value in request.args.items() if key != 'cursor'}
+
+    # seek on the active sort keys plus id, which makes the order unique
+    sort_keys = _get_sort_keys(model)
+    if 'id' not in {column_attr.key for column_attr, _ in sort_keys}:
+        sort_keys.append((model.id, False))
+    for column_attr, _ in sort_keys:
+        # NULL cannot be compared in the seek expression and its position in order differs between databases
+        if column_attr.property.columns[0].nullable:
+            abort(400, f'Cursor pagination cannot be sorted by {column_attr.key}, which can be empty')
+
+    values, backwards = _decode_cursor(cursor, sort_keys) if cursor else (None, False)
+    count_query = query.order_by(None)
+    query = query.order_by(None)
+    for column_attr, desc in sort_keys:
+        query = query.order_by(column_attr.asc() if desc == backwards else column_attr.desc())
+    if values is not None:
+        query = query.filter(_get_seek_expression(sort_keys, values, backwards))
+
+    # fetch one extra row to know whether there is something behind the page
+    items = query.limit(limit + 1).all()
+    has_more = len(items) > limit
+    items = items[:limit]
+    if backwards:
+        items.reverse()
+    has_next = values is not None if backwards else has_more
+    has_prev = has_more if backwards else values is not None
+
+    pagination = {
+        'current_page': url_for(func_name, cursor=cursor or '', **params)
+    }
+
+    if request.args.get('count', '').lower() in ('true', 'estimate'):
+        pagination['total_records'], pagination['count_type'] = get_total(count_query)
+
+    if items and has_next:
+        next_values = [getattr(items[-1], column_attr.key) for column_attr, _ in sort_keys]
+        pagination['next_cursor'] = url_for(func_name, cursor=_encode_cursor(next_values, False), **params)
+
+    if items and has_prev:
+        prev_values = [getattr(items[0], column_attr.key) for column_attr, _ in sort_keys]
+        pagination['prev_cursor'] = url_for(func_name, cursor=_encode_cursor(prev_values, True), **params)
+
+    return items, pagination
+
+
+def check_batch_size(data: list) -> None:
+    max_size = current_app.config.get('BATCH_MAX_SIZE', 1000)
+    if len(data) > max_size:
+        abort(400, f'Batch can contain at most {max_size} items')
+
+
+def load_batch(schema: Schema) -> Tuple[dict, dict]:
+    data = request.get_json()
+    if not isinstance(data, list):
+        abort(400, 'Request body must be a list')
+    check_batch_size(data)
+    return validate_batch(schema, data)
+
+
+def validate_batch(schema: Schema, data: list) -> Tuple[dict, dict]:
+    # returns valid items and validation errors, both keyed by index of item in data
+    try:
+        items = schema.load(data, many=True)
+        errors = {}
+    except ValidationError as err:
+        items, errors = err.valid_data, err.messages
+    return {index: item for index, item in enumerate(items) if index not in errors}, errors
+
+
+def filter_new_books(items: dict, errors: dict) -> dict:
+    # set-based author existence and isbn uniqueness checks, rejected items are added to errors
+    author_ids = {item['author_id'] for item in items.values() if 'author_id' in item}
+    existing_author_ids = {author_id for author_id, in db.session.query(Author.id).filter(Author.id.in_(author_ids))}
+    isbns = {item['isbn'] for item in items.values()}
+    used_isbns = {isbn for isbn, in db.session.query(Book.isbn).filter(Book.isbn.in_(isbns))}
+
+    rows = {}
+    for index, item in items.items():
+        author_id = item.get('author_id')
+        if author_id is None:
+            errors[index] = {'author_id': ['Missing data for required field.']}
+        elif author_id not in existing_author_ids:
+            errors[index] = {'author_id': [f'Author with id {author_id} not found!']}
+        elif item['isbn'] in used_isbns:
+            errors[index] = {'isbn': [f'Book with isbn {item["isbn"]} already exists!']}
+        else:
+            # isbn can be duplicated inside batch too
+            used_isbns.add(item['isbn'])
+            rows[index] = item
+    return rows
+
+
+def fill_missing_keys(rows: List[dict]) -> List[dict]:
+    # executemany builds one statement from keys of the first row - missing optional fields are written as NULL
+    keys = set().union(*rows)
+    return [{**dict.fromkeys(keys), **row} for row in rows]
+
+
+def bulk_insert(model: DefaultMeta, rows: List[dict]) -> None:
+    # primary keys are set into rows
+    if not rows:
+        return
+    if db.engine.dialect.name == 'postgresql':
+        # reserve ids with one query, then insert everything with a single executemany
+        ids = db.session.execute(
+            text('SELECT nextval(:sequence) FROM generate_series(1, :count)'),
+            {'sequence': f'{model.__tablename__}_id_seq', 'count': len(rows)}
+        ).scalars().all()
+        for row, row_id in zip(rows, ids):
+            row['id'] = row_id
+        db.session.execute(model.__table__.insert(), fill_missing_keys(rows))
+    else:
+        db.session.bulk_insert_mappings(model, rows, return_defaults=True)
+    # bulk operations skip session flush events
+    TableVersion.mark_changed(db.session, {model.__tablename__})
+    if model is Book:
+        Author.update_books_count(db.session.connection(), Counter(row['author_id'] for row in rows))
+
+
+def bulk_update(model: DefaultMeta, rows: List[dict]) -> None:
+    if not rows:
+        return
+    deltas = _get_moved_books_deltas(rows) if model is Book else None
+    db.session.bulk_update_mappings(model, rows)
+    TableVersion.mark_changed(db.session, {model.__tablename__})
+    if deltas:
+        Author.update_books_count(db.session.connection(), deltas)
+
+
+def _get_moved_books_deltas(rows: List[dict]) -> Counter:
+    new_author_ids = {row['id']: row['author_id'] for row in rows if 'author_id' in row}
+    deltas = Counter()
+    if not new_author_ids:
+        return deltas
+    old_author_ids = db.session.query(Book.id, Book.author_id) \
+        .filter(Book.id.in_(new_author_ids)).with_for_update()
+    for book_id, author_id in old_author_ids:
+        if author_id != new_author_ids[book_id]:
+            deltas[author_id] -= 1
+            deltas[new_author_ids[book_id]] += 1
+    return deltas
+
+
+def bulk_delete(model: DefaultMeta, *criterion) -> int:
+    if model is Book:
+        # rows are locked, so the counters match what is actually deleted
+        deltas = Counter()
+        for author_id, in db.session.query(Book.author_id).filter(*criterion).with_for_update():
+            deltas[author_id] -= 1
+    count = model.query.filter(*criterion).delete(synchronize_session=False)
+    TableVersion.mark_changed(db.session, {model.__tablename__})
+    if model is Book:
+        Author.update_books_count(db.session.connection(), deltas)
+    return count
+
+
+def delete_in_chunks(model: DefaultMeta, *criterion, chunk_size: int = 1000) -> int:
+    """Delete matching rows in short transactions, so a very large delete does not hold locks for long."""
+    deleted = 0
+    while True:
+        ids = [row_id for row_id, in db.session.query(model.id).filter(*criterion).limit(chunk_size)]
+        if not ids:
+            return deleted
+        deleted += bulk_delete(model, model.id.in_(ids))
+        db.session.commit()
+
+
+def get_batch_response(schema: Schema, rows: dict, errors: dict, status_code: int) -> Tuple[Response, int]:
+    results = []
+    for index in sorted(rows.keys() | errors.keys()):
+        if index in errors:
+            results.append({'index': index, 'success': False, 'message': errors[index]})
+        else:
+            results.append({'index': index, 'success': True, 'data': schema.dump(rows[index])})
+    response = jsonify({
+        'success': not errors,
+        'data': results,
+        'number_of_records': len(rows),
+        'number_of_errors': len(errors)
+    })
+    # multi-status when only part of batch has been processed
+    return response, status_code if not errors else 207
@@ -12,13 +12,50 @@ class Config:
     # DEBUG = True
     SECRET_KEY = os.environ.get('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = ''
+    SQLALCHEMY_REPLICA_URIS = []
+    REPLICA_RETRY_SECONDS = 30
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     PER_PAGE = 5
+    MAX_PER_PAGE = 100
     JWT_EXPIRED_MINUTES = 30
+    JWT_CACHE_SIZE = 1024
+    JWT_CACHE_TTL = 60
+    ADMIN_USERS = [username for username in os.environ.get('ADMIN_USERS', '').split(',') if username]
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:260000'
+    # request threads per process - size of ASGI thread pool, run a threaded WSGI server with the same number
+    WORKER_THREADS = int(os.environ.get('WORKER_THREADS', 8))
+    PASSWORD_HASH_CONCURRENCY = max(1, WORKER_THREADS // 4)
+    PASSWORD_HASH_WAIT = 0.5
+    ASGI_THREADS = WORKER_THREADS
+    JSON_PROVIDER = 'orjson'
+    CACHE_BACKEND = 'lru'
+    CACHE_MAX_SIZE = 1024
+    CACHE_TTL = 60
+    COUNT_CACHE_SIZE = 1024
+    COUNT_CACHE_TTL = 300
+    BATCH_MAX_SIZE = 5000
+    EXPORT_CHUNK_SIZE = 1000
+    DELETE_CHUNK_SIZE = 1000
+    BACKGROUND_WORKERS = 2
+    INDEX_ADVISOR = False
+    INDEX_ADVISOR_SLOW_QUERY_MS = 100
+    INDEX_ADVISOR_MAX_QUERIES = 50
+    RATELIMIT_ENABLED = True
+    RATELIMIT_BACKEND = 'memory'
+    RATELIMIT_DEFAULT = '300/minute'
+    RATELIMIT_LIMITS = {
+        'auth.login': '10/minute',
+        'auth.register': '10/minute'
+    }
+    PROFILING = os.environ.get('PROFILING', 'false').lower() == 'true'
+    PROFILING_SERVER_TIMING = True
+    PROFILING_DIR = os.environ.get('PROFILING_DIR')
+    PROFILING_SECRET = os.environ.get('PROFILING_SECRET')
 
 
 class DevelopmentConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI')
+    INDEX_ADVISOR = True
 
 
 class TestingConfig(Config):
@@ -26,6 +63,7 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{DB_FILE_PATH}'
     DEBUG = True
     TESTING = True
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
 
 
 class ProductionConfig(Config):
@@ -34,6 +72,20 @@ class ProductionConfig(Config):
     DB_PASSWORD = os.environ.get("DB_PASSWORD")
     DB_NAME = os.environ.get("DB_NAME")
     SQLALCHEMY_DATABASE_URI = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}'
+    # size pool_size + max_overflow against number of web workers/threads per process
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true',
+        'connect_args': {
+            'options': f'-c statement_timeout={int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 30000))}'
+        }
+    }
+    DB_POOL_METRICS = os.environ.get('DB_POOL_METRICS', 'true').lower() == 'true'
+    SQLALCHEMY_REPLICA_URIS = [f'postgresql://{DB_USER}:{DB_PASSWORD}@{host}/{DB_NAME}'
+                               for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',') if host]
 
 config = {
     'development': DevelopmentConfig,
@@ -25,6 +25,12 @@ config.set_main_option(
     str(current_app.extensions['migrate'].db.get_engine().url).replace(
         '%', '%%'))
 target_metadata = current_app.extensions['migrate'].db.metadata
+# database objects created by hand in migrations and not mapped in models
+UNMAPPED_OBJECTS = {'search_vector', 'ix_book_search_vector'}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (reflected and name in UNMAPPED_OBJECTS)
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -78,6 +84,7 @@ def run_migrations_online():
             connection=connection,
             target_metadata=target_metadata,
             process_revision_directives=process_revision_directives,
+            include_object=include_object,
             **current_app.extensions['migrate'].configure_args
         )
 
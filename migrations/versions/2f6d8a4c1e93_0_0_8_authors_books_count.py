@@ -0,0 +1,37 @@
+"""authors books count
+
+Revision ID: 2f6d8a4c1e93
+Revises: 9e4b5c2d8f17
+Create Date: 2026-10-18 17:21:36.104582
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f6d8a4c1e93'
+down_revision = '9e4b5c2d8f17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('authors') as batch_op:
+        batch_op.add_column(sa.Column('books_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_index(op.f('ix_authors_books_count'), 'authors', ['books_count'], unique=False)
+    # backfill existing authors with one statement
+    op.execute('UPDATE authors SET books_count = '
+               '(SELECT count(*) FROM book WHERE book.author_id = authors.id)')
+
+
+def downgrade():
+    op.drop_index(op.f('ix_authors_books_count'), table_name='authors')
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    if sqlite:
+        # batch mode recreates the table, dropping the old one would run ON DELETE CASCADE on books
+        op.execute('PRAGMA foreign_keys=OFF')
+    with op.batch_alter_table('authors') as batch_op:
+        batch_op.drop_column('books_count')
+    if sqlite:
+        op.execute('PRAGMA foreign_keys=ON')
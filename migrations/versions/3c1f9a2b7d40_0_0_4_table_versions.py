@@ -0,0 +1,36 @@
+"""table versions
+
+Revision ID: 3c1f9a2b7d40
+Revises: 8118e702e61e
+Create Date: 2026-10-18 09:12:41.532817
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f9a2b7d40'
+down_revision = '8118e702e61e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table_versions = op.create_table('table_versions',
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    now = datetime.utcnow()
+    op.bulk_insert(table_versions, [
+        {'table_name': 'authors', 'version': 1, 'updated_at': now},
+        {'table_name': 'book', 'version': 1, 'updated_at': now}
+    ])
+
+
+def downgrade():
+    op.drop_table('table_versions')
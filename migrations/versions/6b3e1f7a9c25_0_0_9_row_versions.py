@@ -0,0 +1,37 @@
+"""row versions
+
+Revision ID: 6b3e1f7a9c25
+Revises: 2f6d8a4c1e93
+Create Date: 2026-10-18 19:02:48.713265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b3e1f7a9c25'
+down_revision = '2f6d8a4c1e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('authors') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    with op.batch_alter_table('book') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    if sqlite:
+        # batch mode recreates the tables, dropping old authors would run ON DELETE CASCADE on books -
+        # the pragma has no effect inside a transaction, so it goes before the first copy of rows
+        op.execute('PRAGMA foreign_keys=OFF')
+    with op.batch_alter_table('book') as batch_op:
+        batch_op.drop_column('version')
+    with op.batch_alter_table('authors') as batch_op:
+        batch_op.drop_column('version')
+    if sqlite:
+        op.execute('PRAGMA foreign_keys=ON')
@@ -0,0 +1,39 @@
+"""book author on delete cascade
+
+Revision ID: 9e4b5c2d8f17
+Revises: 5d8a31c6e0f2
+Create Date: 2026-10-18 15:42:10.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4b5c2d8f17'
+down_revision = '5d8a31c6e0f2'
+branch_labels = None
+depends_on = None
+
+# foreign key was created unnamed - postgresql named it book_author_id_fkey, on sqlite it is
+# given a name through naming convention of batch mode
+SQLITE_NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _replace_foreign_key(ondelete):
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('book', naming_convention=SQLITE_NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint('fk_book_author_id_authors', type_='foreignkey')
+            batch_op.create_foreign_key('fk_book_author_id_authors', 'authors', ['author_id'], ['id'],
+                                        ondelete=ondelete)
+    else:
+        op.drop_constraint('book_author_id_fkey', 'book', type_='foreignkey')
+        op.create_foreign_key('book_author_id_fkey', 'book', 'authors', ['author_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _replace_foreign_key('CASCADE')
+
+
+def downgrade():
+    _replace_foreign_key(None)
@@ -0,0 +1,36 @@
+"""book search vector
+
+Revision ID: b7e2d94c1a55
+Revises: 3c1f9a2b7d40
+Create Date: 2026-10-18 11:40:03.218094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2d94c1a55'
+down_revision = '3c1f9a2b7d40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # full text search is postgresql only, other databases use in-process index (book_library_api.search)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(
+        "ALTER TABLE book ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+        ") STORED"
+    )
+    op.create_index('ix_book_search_vector', 'book', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_book_search_vector', table_name='book')
+    op.drop_column('book', 'search_vector')
@@ -1,4 +1,10 @@
+import os
+import asyncio
 import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
+from uvicorn.middleware.wsgi import WSGIMiddleware
+from werkzeug.test import EnvironBuilder
 
 from book_library_api import create_app, db
 from book_library_api.commands.db_manage_commands import add_data
@@ -16,10 +22,71 @@ def app():
     app.config['DB_FILE_PATH'].unlink(missing_ok=True)
 
 
+class AsgiTestClient:
+    """Sends requests through uvicorn WSGIMiddleware, has the same API as flask test client used in tests."""
+
+    def __init__(self, app):
+        self.app = app
+        self.asgi_app = WSGIMiddleware(app, workers=app.config.get('ASGI_THREADS', 8))
+
+    def open(self, path: str, method: str, **kwargs):
+        builder = EnvironBuilder(path=path, method=method, **kwargs)
+        environ = builder.get_environ()
+        body = environ['wsgi.input'].read()
+        headers = [(key[5:].replace('_', '-').lower().encode('latin1'), value.encode('latin1'))
+                   for key, value in environ.items()
+                   if key.startswith('HTTP_') and key not in ('HTTP_CONTENT_TYPE', 'HTTP_CONTENT_LENGTH')]
+        for key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            if environ.get(key):
+                headers.append((key.replace('_', '-').lower().encode('latin1'), environ[key].encode('latin1')))
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': environ['PATH_INFO'].encode('latin1').decode('utf8'),
+            'query_string': environ['QUERY_STRING'].encode('latin1'),
+            'root_path': '',
+            'headers': headers,
+            'client': ('127.0.0.1', 50000),
+            'server': ('localhost', 80)
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(self.asgi_app(scope, receive, send))
+        start = messages[0]
+        response_body = b''.join(message.get('body', b'') for message in messages[1:])
+        response_headers = [(name.decode('latin1'), value.decode('latin1')) for name, value in start['headers']]
+        return self.app.response_class(response_body, status=start['status'], headers=response_headers)
+
+    def get(self, path: str, **kwargs):
+        return self.open(path, 'GET', **kwargs)
+
+    def post(self, path: str, **kwargs):
+        return self.open(path, 'POST', **kwargs)
+
+    def put(self, path: str, **kwargs):
+        return self.open(path, 'PUT', **kwargs)
+
+    def delete(self, path: str, **kwargs):
+        return self.open(path, 'DELETE', **kwargs)
+
+
 @pytest.fixture()
 def client(app):
-    with app.test_client() as client:
-        yield client
+    # API_SERVING_MODE=asgi python -m pytest - run the suite through asgi adapter
+    if os.environ.get('API_SERVING_MODE') == 'asgi':
+        yield AsgiTestClient(app)
+    else:
+        with app.test_client() as client:
+            yield client
 
 
 @pytest.fixture()
@@ -42,6 +109,12 @@ def token(client, user):
     return response.get_json()['token']
 
 
+@pytest.fixture()
+def admin_token(app, user, token):
+    app.config['ADMIN_USERS'] = [user['username']]
+    return token
+
+
 @pytest.fixture()
 def sample_data(app):
     runner = app.test_cli_runner()
@@ -56,3 +129,25 @@ def author():
         'birth_date': '24-12-1798'
     }
 
+
+@pytest.fixture()
+def assert_num_queries(app):
+    # usage: with assert_num_queries(2): client.get(...)
+    @contextmanager
+    def _assert_num_queries(expected: int):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        assert len(statements) == expected, \
+            f'Expected {expected} queries, got {len(statements)}:\n' + '\n'.join(statements)
+
+    return _assert_num_queries
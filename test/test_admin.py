@@ -0,0 +1,148 @@
+import pytest
+from sqlalchemy import create_engine, exc
+from book_library_api import db, index_advisor, profiler
+from book_library_api.pool import InstrumentedQueuePool, get_pool_stats
+
+
+def test_get_cache_stats(client, admin_token, sample_data):
+    client.get('api/v1/books?sort=id&limit=2')
+    client.get('api/v1/books?limit=2&sort=id')
+    response = client.get('api/v1/admin/cache', headers={
+        'Authorization': f'Bearer {admin_token}'
+    })
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['success'] is True
+    assert response_data['data']['hits'] == 1
+    assert response_data['data']['misses'] == 1
+    assert response_data['data']['size'] == 1
+
+
+def test_get_cache_stats_missing_token(client):
+    response = client.get('api/v1/admin/cache')
+    assert response.status_code == 401
+
+
+def test_get_cache_stats_not_admin(client, token):
+    response = client.delete('api/v1/admin/cache', headers={
+        'Authorization': f'Bearer {token}'
+    })
+    response_data = response.get_json()
+    assert response.status_code == 403
+    assert response_data['success'] is False
+    assert response_data['message'] == 'Admin permissions required'
+
+
+def test_get_index_advisor_report(app, client, admin_token, sample_data):
+    app.config['INDEX_ADVISOR'] = True
+    app.config['INDEX_ADVISOR_SLOW_QUERY_MS'] = 0
+    index_advisor.init_app(app, db)
+    client.get('api/v1/books?number_of_pages[gt]=100&sort=title')
+    client.get('api/v1/books?description=abc&sort=-title')
+
+    response = client.get('api/v1/admin/index-advisor', headers={
+        'Authorization': f'Bearer {admin_token}'
+    })
+    response_data = response.get_json()
+    assert response.status_code == 200
+    report = response_data['data']
+    assert report['enabled'] is True
+    columns = {(item['table'], item['column']): item for item in report['columns']}
+    assert columns[('book', 'title')]['sort'] == 2
+    assert columns[('book', 'title')]['indexed'] is True
+    assert columns[('book', 'number_of_pages')]['filter'] == 1
+    assert columns[('book', 'description')]['indexed'] is False
+    assert report['slow_queries']
+    assert all(item['plan'] for item in report['slow_queries'])
+
+
+def test_get_index_advisor_report_disabled(client, admin_token):
+    response = client.get('api/v1/admin/index-advisor', headers={
+        'Authorization': f'Bearer {admin_token}'
+    })
+    assert response.status_code == 200
+    assert response.get_json()['data'] == {'enabled': False}
+
+
+def test_get_pool_metrics(client, admin_token):
+    response = client.get('api/v1/admin/pool', headers={
+        'Authorization': f'Bearer {admin_token}'
+    })
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['data']['pool_class']
+    assert 'status' in response_data['data']
+
+
+def test_instrumented_pool_metrics(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "pool.db"}', poolclass=InstrumentedQueuePool,
+                           pool_size=1, max_overflow=1, pool_timeout=0.1,
+                           connect_args={'check_same_thread': False})
+    first = engine.connect()
+    second = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    second.invalidate()
+    second.close()
+    first.close()
+
+    stats = get_pool_stats(engine.pool)
+    assert stats['pool_class'] == 'InstrumentedQueuePool'
+    metrics = stats['metrics']
+    assert metrics['checkouts'] == 2
+    assert metrics['overflow_checkouts'] == 1
+    assert metrics['timeouts'] == 1
+    assert metrics['connects'] == 2
+    assert metrics['invalidations'] == 1
+    assert sum(metrics['wait_time_histogram_ms'].values()) == 2
+
+
+@pytest.fixture()
+def profiling(app, tmp_path):
+    app.config['PROFILING'] = True
+    app.config['PROFILING_DIR'] = str(tmp_path)
+    app.config['PROFILING_SECRET'] = 'profiling-secret'
+    profiler.init_app(app)
+
+
+def test_get_profiling_report(profiling, client, admin_token, sample_data, tmp_path):
+    response = client.get('api/v1/books')
+    server_timing = response.headers['Server-Timing']
+    assert all(f'{phase};dur=' in server_timing for phase in ('sql', 'dump', 'encode', 'total'))
+    response = client.get('api/v1/books?limit=2', headers={'X-Profile': 'profiling-secret'})
+    assert response.headers['X-Profile-File'].startswith(str(tmp_path))
+    assert list(tmp_path.glob('books.get_books-*.prof'))
+
+    response = client.get('api/v1/admin/profiling', headers={
+        'Authorization': f'Bearer {admin_token}'
+    })
+    report = response.get_json()['data']
+    assert report['enabled'] is True
+    books = report['endpoints']['books.get_books']
+    assert books['total']['count'] == 2
+    assert books['queries'] >= 4
+    assert books['sql']['sum_ms'] > 0
+
+    response = client.get('api/v1/admin/profiling?format=prometheus', headers={
+        'Authorization': f'Bearer {admin_token}'
+    })
+    text = response.get_data(as_text=True)
+    assert response.mimetype == 'text/plain'
+    assert 'api_request_phase_seconds_bucket{endpoint="books.get_books",phase="total",le="+Inf"} 2' in text
+    assert 'api_request_phase_seconds_count{endpoint="books.get_books",phase="dump"} 2' in text
+
+
+def test_profile_request_wrong_secret(profiling, client, tmp_path):
+    response = client.get('api/v1/books?limit=2', headers={'X-Profile': '1'})
+    assert response.status_code == 200
+    assert 'Server-Timing' in response.headers
+    assert 'X-Profile-File' not in response.headers
+    assert not list(tmp_path.glob('*.prof'))
+
+
+def test_get_profiling_report_disabled(client, admin_token):
+    response = client.get('api/v1/admin/profiling', headers={
+        'Authorization': f'Bearer {admin_token}'
+    })
+    assert response.get_json()['data'] == {'enabled': False}
+    assert 'Server-Timing' not in response.headers
@@ -0,0 +1,31 @@
+import asyncio
+from uvicorn.middleware.wsgi import WSGIMiddleware
+
+
+def test_asgi_app_streams_response(app, sample_data):
+    app.config['EXPORT_CHUNK_SIZE'] = 5
+    adapter = WSGIMiddleware(app, workers=2)
+    scope = {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': 'GET',
+        'path': '/api/v1/books:export',
+        'query_string': b'format=ndjson',
+        'headers': []
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(adapter(scope, receive, send))
+    assert messages[0]['status'] == 200
+    headers = [(name.lower(), value) for name, value in messages[0]['headers']]
+    assert (b'content-type', b'application/x-ndjson') in headers
+    chunks = [message['body'] for message in messages[1:] if message['body']]
+    assert len(chunks) == 3
+    assert len(b''.join(chunks).splitlines()) == 14
+    assert messages[-1]['more_body'] is False
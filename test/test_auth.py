@@ -1,4 +1,7 @@
 import pytest
+from threading import BoundedSemaphore, Timer
+
+from book_library_api.models import User
 
 def test_registration(client):
     response = client.post('/api/v1/auth/register', json={
@@ -74,6 +77,19 @@ def test_registration_already_used_email(client, user):
     assert 'token' not in response_data
 
 
+def test_registration_already_used_username_not_hashed(app, client, user):
+    slots = BoundedSemaphore(1)
+    slots.acquire()
+    app.extensions['password_hasher'].update(slots=slots, wait=0.01)
+    response = client.post('/api/v1/auth/register', json={
+        'username': user['username'],
+        'email': 'w111@op.pl',
+        'password': '123456'
+    })
+    assert response.status_code == 409
+    assert response.get_json()['message'] == f'Username {user["username"]} already exists!'
+
+
 def test_get_current_user(client, user, token):
     response = client.get('/api/v1/auth/me', headers={
         'Authorization': f'Bearer {token}'
@@ -95,3 +111,94 @@ def test_get_current_user_missing_token(client):
     assert response.headers['Content-Type'] == 'application/json'
     assert response_data['success'] is False
     assert 'Missing token. Please login or register' in response_data['message']
+
+
+def test_token_cached_after_first_verification(client, token, monkeypatch):
+    headers = {'Authorization': f'Bearer {token}'}
+    assert client.get('/api/v1/auth/me', headers=headers).status_code == 200
+
+    def decode(*args, **kwargs):
+        raise AssertionError('token should be served from cache')
+
+    monkeypatch.setattr('book_library_api.utils.jwt.decode', decode)
+    response = client.get('/api/v1/auth/me', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['data']['username'] == 'db1011'
+
+
+def test_expired_token_not_cached(app, client, user):
+    app.config['JWT_EXPIRED_MINUTES'] = -1
+    response = client.post('/api/v1/auth/login', json={
+        'username': user['username'],
+        'password': user['password']
+    })
+    token = response.get_json()['token']
+    for _ in range(2):
+        response = client.get('/api/v1/auth/me', headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 401
+        assert 'Expired token' in response.get_json()['message']
+    assert len(app.extensions['token_cache']) == 0
+
+
+def test_login_rehash_outdated_password(app, client, user):
+    with app.app_context():
+        old_hash = User.query.filter(User.username == user['username']).first().password
+    assert old_hash.startswith('pbkdf2:sha256:1000$')
+
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    response = client.post('/api/v1/auth/login', json={
+        'username': user['username'],
+        'password': user['password']
+    })
+    assert response.status_code == 200
+    with app.app_context():
+        new_hash = User.query.filter(User.username == user['username']).first().password
+    assert new_hash.startswith('pbkdf2:sha256:2000$')
+
+    response = client.post('/api/v1/auth/login', json={
+        'username': user['username'],
+        'password': user['password']
+    })
+    assert response.status_code == 200
+
+
+def test_login_password_hashing_saturated(app, client, user):
+    slots = BoundedSemaphore(1)
+    slots.acquire()
+    app.extensions['password_hasher'].update(slots=slots, wait=0.01)
+    response = client.post('/api/v1/auth/login', json={
+        'username': user['username'],
+        'password': user['password']
+    })
+    response_data = response.get_json()
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    assert response_data['success'] is False
+
+
+def test_login_password_hashing_waits_for_slot(app, client, user):
+    slots = BoundedSemaphore(1)
+    slots.acquire()
+    app.extensions['password_hasher'].update(slots=slots, wait=5)
+    Timer(0.05, slots.release).start()
+    response = client.post('/api/v1/auth/login', json={
+        'username': user['username'],
+        'password': user['password']
+    })
+    assert response.status_code == 200
+
+
+def test_update_user_data_already_used_email(client, token):
+    client.post('/api/v1/auth/register', json={
+        'username': 'other_user',
+        'email': 'other@op.pl',
+        'password': '123456'
+    })
+    response = client.put('/api/v1/auth/update/data', json={'username': 'db1011', 'email': 'other@op.pl'},
+                          headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 409
+    assert response.get_json()['message'] == 'Email other@op.pl already exists!'
+    response = client.put('/api/v1/auth/update/data', json={'username': 'db1011', 'email': 'new@op.pl'},
+                          headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    assert response.get_json()['data']['email'] == 'new@op.pl'
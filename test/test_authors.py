@@ -1,3 +1,4 @@
+import time
 import pytest
 
 
@@ -10,6 +11,7 @@ def test_get_authors_no_records(client):
         'pagination': {
             'total_pages': 0,
             'total_records': 0,
+            'count_type': 'exact',
             'current_page': '/api/v1/authors?page=1'
         }
     }
@@ -29,6 +31,7 @@ def test_get_authors(client, sample_data):
     assert response_data['pagination'] == {
             'total_pages': 2,
             'total_records': 10,
+            'count_type': 'exact',
             'current_page': '/api/v1/authors?page=1',
             'next_page': '/api/v1/authors?page=2'
     }
@@ -44,6 +47,7 @@ def test_get_authors_with_params(client, sample_data):
     assert response_data['pagination'] == {
             'total_pages': 5,
             'total_records': 10,
+            'count_type': 'exact',
             'current_page': '/api/v1/authors?page=2&fields=first_name&sort=-id&limit=2',
             'next_page': '/api/v1/authors?page=3&fields=first_name&sort=-id&limit=2',
             'previous_page': '/api/v1/authors?page=1&fields=first_name&sort=-id&limit=2'
@@ -91,6 +95,7 @@ def test_create_author(client, token, author):
         'data': {
             **author,
             'id': 1,
+            'books_count': 0,
             'books': []
 
         }
@@ -158,3 +163,177 @@ def test_create_author_missing_token(client, author):
     assert response_data['success'] is False
     assert 'data' not in response_data
 
+
+
+def test_get_authors_cursor(client, sample_data):
+    response = client.get('api/v1/authors?cursor=&sort=-id&limit=4&fields=id')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['success'] is True
+    assert [item['id'] for item in response_data['data']] == [10, 9, 8, 7]
+    assert 'total_records' not in response_data['pagination']
+    assert 'prev_cursor' not in response_data['pagination']
+
+    response = client.get(response_data['pagination']['next_cursor'])
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert [item['id'] for item in response_data['data']] == [6, 5, 4, 3]
+
+    response = client.get(response_data['pagination']['prev_cursor'])
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert [item['id'] for item in response_data['data']] == [10, 9, 8, 7]
+    assert 'prev_cursor' not in response_data['pagination']
+
+
+def test_get_authors_cursor_with_count(client, sample_data):
+    response = client.get('api/v1/authors?cursor=&count=true&sort=last_name&limit=6')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['pagination']['total_records'] == 10
+    last_names = [item['last_name'] for item in response_data['data']]
+
+    response = client.get(response_data['pagination']['next_cursor'])
+    response_data = response.get_json()
+    last_names += [item['last_name'] for item in response_data['data']]
+    assert len(last_names) == 10
+    assert last_names == sorted(last_names)
+    assert 'next_cursor' not in response_data['pagination']
+
+
+def test_get_authors_invalid_cursor(client, sample_data):
+    response = client.get('api/v1/authors?cursor=invalid')
+    response_data = response.get_json()
+    assert response.status_code == 400
+    assert response.headers['Content-Type'] == 'application/json'
+    assert response_data['success'] is False
+
+
+def test_get_authors_query_count(client, sample_data, assert_num_queries):
+    # table versions + count + page + one IN query for all books of the page
+    with assert_num_queries(4):
+        response = client.get('api/v1/authors?limit=10')
+    assert response.get_json()['number_of_records'] == 10
+
+    with assert_num_queries(3):
+        response = client.get('api/v1/authors?fields=id,last_name&limit=10')
+    assert response.get_json()['number_of_records'] == 10
+
+
+def test_get_authors_fields_with_books(client, sample_data):
+    response = client.get('api/v1/authors?fields=last_name,books&sort=id&limit=1')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert set(response_data['data'][0]) == {'last_name', 'books'}
+    assert len(response_data['data'][0]['books']) > 0
+
+
+def test_get_author_books_cache_invalidated_on_author_delete(client, token, sample_data):
+    response = client.get('api/v1/books?author_id=1')
+    assert response.get_json()['number_of_records'] > 0
+    response = client.delete('api/v1/authors/1', headers={
+        'Authorization': f'Bearer {token}'
+    })
+    assert response.status_code == 200
+    response = client.get('api/v1/books?author_id=1')
+    assert response.get_json()['number_of_records'] == 0
+
+
+def test_create_authors_batch(client, token, author):
+    response = client.post('api/v1/authors:batch', json=[author, {'first_name': 'Jan'}, author], headers={
+        'Authorization': f'Bearer {token}'
+    })
+    response_data = response.get_json()
+    assert response.status_code == 207
+    assert response_data['number_of_records'] == 2
+    assert response_data['data'][0]['data'] == {**author, 'id': 1}
+    assert response_data['data'][1]['success'] is False
+    assert 'last_name' in response_data['data'][1]['message']
+    assert response_data['data'][2]['data']['id'] == 2
+    assert client.get('api/v1/authors/2').get_json()['data']['last_name'] == author['last_name']
+
+
+def test_delete_authors_batch(client, token, sample_data):
+    response = client.delete('api/v1/authors:batch', json={'ids': [1, 2]}, headers={
+        'Authorization': f'Bearer {token}'
+    })
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['success'] is True
+    assert response_data['number_of_records'] == 2
+    assert client.get('api/v1/authors/1').status_code == 404
+    assert client.get('api/v1/books?author_id=1').get_json()['number_of_records'] == 0
+
+
+def test_delete_author(client, token, sample_data, assert_num_queries):
+    books_before = client.get('api/v1/books').get_json()['pagination']['total_records']
+    author_books = client.get('api/v1/authors/1/books').get_json()['number_of_records']
+    # delete + two table versions updates, books are not loaded
+    with assert_num_queries(3):
+        response = client.delete('api/v1/authors/1', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    assert client.get('api/v1/authors/1').status_code == 404
+    assert client.get('api/v1/books').get_json()['pagination']['total_records'] == books_before - author_books
+
+
+def test_delete_author_not_found(client, token):
+    response = client.delete('api/v1/authors/999', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 404
+    assert response.get_json()['message'] == 'Author with id 999 not found!'
+
+
+def test_delete_author_in_background(app, client, token, sample_data):
+    app.config['DELETE_CHUNK_SIZE'] = 1
+    headers = {'Authorization': f'Bearer {token}'}
+    author_books = client.get('api/v1/authors/1/books').get_json()['number_of_records']
+    response = client.delete('api/v1/authors/1?background=true', headers=headers)
+    response_data = response.get_json()
+    assert response.status_code == 202
+    job_url = response_data['data']['status']
+
+    for _ in range(100):
+        job = client.get(job_url, headers=headers).get_json()['data']
+        if job['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.05)
+    assert job['status'] == 'done'
+    assert job['result'] == {'deleted_books': author_books}
+    assert client.get('api/v1/authors/1').status_code == 404
+
+
+def test_get_background_job_of_other_user(client, token, sample_data):
+    response = client.delete('api/v1/authors/1?background=true', headers={'Authorization': f'Bearer {token}'})
+    job_url = response.get_json()['data']['status']
+    client.post('/api/v1/auth/register', json={'username': 'other', 'email': 'other@op.pl', 'password': '123456'})
+    response = client.post('/api/v1/auth/login', json={'username': 'other', 'password': '123456'})
+    response = client.get(job_url, headers={'Authorization': f'Bearer {response.get_json()["token"]}'})
+    assert response.status_code == 404
+
+
+def test_get_authors_sorted_by_books_count(client, sample_data):
+    response = client.get('api/v1/authors?sort=-books_count,id&fields=id,books_count&limit=3')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['data'] == [
+        {'id': 6, 'books_count': 3},
+        {'id': 1, 'books_count': 2},
+        {'id': 7, 'books_count': 2}
+    ]
+
+
+def test_get_authors_filtered_by_books_count(client, sample_data):
+    response = client.get('api/v1/authors?books_count[gte]=2&sort=id&fields=id')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert [item['id'] for item in response_data['data']] == [1, 6, 7]
+
+
+def test_get_authors_filtered_by_birth_date(client, sample_data):
+    response = client.get('api/v1/authors?birth_date[lt]=01-01-1900&fields=id')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['number_of_records'] == 1
+
+    # invalid date is ignored
+    response = client.get('api/v1/authors?birth_date[lt]=1900&fields=id')
+    assert response.get_json()['data'] == client.get('api/v1/authors?fields=id').get_json()['data']
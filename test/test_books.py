@@ -0,0 +1,434 @@
+import base64
+import csv
+import io
+import json
+
+from book_library_api.commands.db_manage_commands import export
+
+
+def test_get_books(client, sample_data):
+    response = client.get('api/v1/books')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/json'
+    assert response_data['success'] is True
+    assert response_data['number_of_records'] == 5
+    assert response_data['pagination']['total_records'] == 14
+
+
+def test_get_books_cursor_with_filter(client, sample_data):
+    response = client.get('api/v1/books?cursor=&number_of_pages[gt]=300&sort=-number_of_pages&limit=3')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    pages = [item['number_of_pages'] for item in response_data['data']]
+    while 'next_cursor' in response_data['pagination']:
+        response_data = client.get(response_data['pagination']['next_cursor']).get_json()
+        pages += [item['number_of_pages'] for item in response_data['data']]
+    assert pages == sorted(pages, reverse=True)
+    assert all(page > 300 for page in pages)
+    assert len(pages) == client.get('api/v1/books?number_of_pages[gt]=300').get_json()['pagination']['total_records']
+
+
+
+def test_get_books_cursor_nullable_sort_key(client, sample_data):
+    response = client.get('api/v1/books?cursor=&sort=description&limit=3')
+    assert response.status_code == 400
+
+
+def test_get_books_cursor_invalid_value_type(client, sample_data):
+    cursor = base64.urlsafe_b64encode(json.dumps({'values': ['x', 1], 'backwards': False}).encode()).decode()
+    response = client.get(f'api/v1/books?cursor={cursor}&sort=number_of_pages')
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Invalid cursor'
+
+def test_get_books_query_count(client, sample_data, assert_num_queries):
+    # table versions + count + page with joined author
+    with assert_num_queries(3):
+        response = client.get('api/v1/books?limit=14')
+    response_data = response.get_json()
+    assert response_data['number_of_records'] == 14
+    assert all('last_name' in item['author'] for item in response_data['data'])
+
+
+def test_get_books_limit_is_capped(app, client, sample_data):
+    app.config['MAX_PER_PAGE'] = 3
+    response_data = client.get('api/v1/books?limit=1000').get_json()
+    assert response_data['number_of_records'] == 3
+    assert response_data['pagination']['total_pages'] == 5
+
+
+def test_get_books_without_count(client, sample_data, assert_num_queries):
+    # table versions + page with one extra row
+    with assert_num_queries(2):
+        response = client.get('api/v1/books?count=false&limit=5&page=2')
+    pagination = response.get_json()['pagination']
+    assert 'total_records' not in pagination
+    assert pagination['next_page'] == '/api/v1/books?page=3&count=false&limit=5'
+    assert pagination['previous_page'] == '/api/v1/books?page=1&count=false&limit=5'
+    last_page = client.get('api/v1/books?count=false&limit=5&page=3').get_json()
+    assert last_page['number_of_records'] == 4
+    assert 'next_page' not in last_page['pagination']
+
+
+def test_get_books_count_is_cached_until_write(client, token, sample_data, assert_num_queries):
+    client.get('api/v1/books?number_of_pages[gt]=300')
+    # cached count is reused for another page of the same filter
+    with assert_num_queries(2):
+        response = client.get('api/v1/books?number_of_pages[gt]=300&page=2')
+    total = response.get_json()['pagination']['total_records']
+    assert response.get_json()['pagination']['count_type'] == 'exact'
+    client.delete('api/v1/books:batch', json={'ids': [item['id'] for item in response.get_json()['data']]},
+                  headers={'Authorization': f'Bearer {token}'})
+    response = client.get('api/v1/books?number_of_pages[gt]=300&page=2')
+    assert response.get_json()['pagination']['total_records'] < total
+
+
+def test_get_books_estimated_count_falls_back_to_exact(client, sample_data):
+    response = client.get('api/v1/books?count=estimate')
+    assert response.get_json()['pagination']['total_records'] == 14
+    assert response.get_json()['pagination']['count_type'] == 'exact'
+
+
+def test_get_single_book_query_count(client, sample_data, assert_num_queries):
+    with assert_num_queries(2):
+        response = client.get('api/v1/books/1')
+    assert response.status_code == 200
+    assert response.get_json()['data']['author']['id'] == 1
+
+
+def test_get_books_fields_projection(client, sample_data, assert_num_queries):
+    with assert_num_queries(3) as statements:
+        response = client.get('api/v1/books?fields=title,isbn')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert set(response_data['data'][0]) == {'title', 'isbn'}
+    assert 'description' not in statements[1]
+    assert 'authors' not in statements[1]
+
+
+def test_get_books_fields_with_author(client, sample_data, assert_num_queries):
+    with assert_num_queries(3) as statements:
+        response = client.get('api/v1/books?fields=title,author')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert set(response_data['data'][0]) == {'title', 'author'}
+    assert set(response_data['data'][0]['author']) == {'id', 'first_name', 'last_name'}
+    assert 'description' not in statements[1]
+
+
+def test_get_books_cached(client, sample_data, assert_num_queries):
+    response = client.get('api/v1/books?sort=-id&limit=3')
+    # only table versions for ETag
+    with assert_num_queries(1):
+        cached_response = client.get('api/v1/books?limit=3&sort=-id')
+    assert cached_response.status_code == 200
+    assert cached_response.headers['Content-Type'] == 'application/json'
+    assert cached_response.get_json() == response.get_json()
+
+
+def test_get_books_cache_invalidated_on_delete(client, token, sample_data):
+    response = client.get('api/v1/books/1')
+    assert response.status_code == 200
+    response = client.delete('api/v1/books/1', headers={
+        'Authorization': f'Bearer {token}'
+    })
+    assert response.status_code == 200
+    response = client.get('api/v1/books/1')
+    assert response.status_code == 404
+
+
+def test_get_books_not_modified(client, sample_data, assert_num_queries):
+    response = client.get('api/v1/books?sort=title')
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+    assert response.headers['Last-Modified']
+
+    with assert_num_queries(1):
+        response = client.get('api/v1/books?sort=title', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.get_data() == b''
+
+    response = client.get('api/v1/books?sort=-title', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+
+def test_get_book_etag_changed_after_update(client, token, sample_data):
+    etag = client.get('api/v1/books/2').headers['ETag']
+    response = client.put('api/v1/books/2',
+                          json={'title': 'New title', 'isbn': 9780000000002, 'number_of_pages': 100},
+                          headers={
+                              'Authorization': f'Bearer {token}',
+                              'If-Match': etag
+                          })
+    assert response.status_code == 200
+    response = client.get('api/v1/books/2', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['data']['title'] == 'New title'
+    assert response.headers['ETag'] != etag
+
+
+def test_update_book_if_match_failed(client, token, sample_data):
+    etag = client.get('api/v1/books/2').headers['ETag']
+    client.put('api/v1/books/2', json={'title': 'Other title', 'isbn': 9780000000002, 'number_of_pages': 100},
+               headers={'Authorization': f'Bearer {token}'})
+    response = client.delete('api/v1/books/2',
+                             headers={
+                                 'Authorization': f'Bearer {token}',
+                                 'If-Match': etag
+                             })
+    response_data = response.get_json()
+    assert response.status_code == 412
+    assert response_data['success'] is False
+    assert client.get('api/v1/books/2').status_code == 200
+
+
+def test_update_book_if_match_other_resources_changed(client, token, sample_data):
+    etag = client.get('api/v1/books/2').headers['ETag']
+    client.delete('api/v1/books/3', headers={'Authorization': f'Bearer {token}'})
+    client.put('api/v1/authors/2', json={'first_name': 'Other', 'last_name': 'Name', 'birth_date': '01-01-1900'},
+               headers={'Authorization': f'Bearer {token}'})
+    assert client.get('api/v1/books/2').headers['ETag'] == etag
+    response = client.delete('api/v1/books/2',
+                             headers={
+                                 'Authorization': f'Bearer {token}',
+                                 'If-Match': etag
+                             })
+    assert response.status_code == 200
+
+
+def test_get_book_etag_changed_after_author_update(client, token, sample_data):
+    response = client.get('api/v1/books/2')
+    author_id = response.get_json()['data']['author']['id']
+    client.put(f'api/v1/authors/{author_id}',
+               json={'first_name': 'Other', 'last_name': 'Name', 'birth_date': '01-01-1900'},
+               headers={'Authorization': f'Bearer {token}'})
+    response = client.get('api/v1/books/2', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_json()['data']['author']['first_name'] == 'Other'
+
+
+def test_update_book_keeps_own_isbn(client, token, sample_data):
+    book = client.get('api/v1/books/2').get_json()['data']
+    response = client.put('api/v1/books/2',
+                          json={'title': 'New title', 'isbn': book['isbn'], 'number_of_pages': 100, 'author_id': 2},
+                          headers={'Authorization': f'Bearer {token}'})
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['data']['isbn'] == book['isbn']
+    assert response_data['data']['author']['id'] == 2
+
+
+def test_update_book_duplicated_isbn(client, token, sample_data):
+    isbn = client.get('api/v1/books/3').get_json()['data']['isbn']
+    response = client.put('api/v1/books/2',
+                          json={'title': 'New title', 'isbn': isbn, 'number_of_pages': 100},
+                          headers={'Authorization': f'Bearer {token}'})
+    response_data = response.get_json()
+    assert response.status_code == 409
+    assert response_data == {'success': False, 'message': f'Isbn {isbn} already exists!'}
+    assert client.get('api/v1/books/2').get_json()['data']['title'] != 'New title'
+
+
+def test_create_book_duplicated_isbn(client, token, sample_data, assert_num_queries):
+    isbn = client.get('api/v1/books/3').get_json()['data']['isbn']
+    # author + insert, no select checking the isbn first
+    with assert_num_queries(2):
+        response = client.post('api/v1/authors/1/books',
+                               json={'title': 'Duplicate', 'isbn': isbn, 'number_of_pages': 100},
+                               headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 409
+    assert response.get_json()['message'] == f'Isbn {isbn} already exists!'
+
+
+def test_create_book_query_count(client, token, sample_data, assert_num_queries):
+    # author + insert + table versions update + author books_count update
+    with assert_num_queries(4):
+        response = client.post('api/v1/authors/1/books',
+                               json={'title': 'New book', 'isbn': 9780000000999, 'number_of_pages': 100},
+                               headers={'Authorization': f'Bearer {token}'})
+    response_data = response.get_json()
+    assert response.status_code == 201
+    assert response_data['data']['author']['id'] == 1
+    assert response_data['data']['id']
+
+
+def test_delete_book_not_found(client, token, sample_data):
+    response = client.delete('api/v1/books/999', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 404
+    assert response.get_json()['message'] == 'Book with id 999 not found!'
+
+
+def test_create_books_batch(client, token, sample_data):
+    books = [
+        {'title': 'Batch 1', 'isbn': 9780000000101, 'number_of_pages': 10, 'author_id': 1},
+        {'title': 'Batch 2', 'isbn': 9780000000101, 'number_of_pages': 10, 'author_id': 1},
+        {'title': 'Batch 3', 'isbn': 9780000000103, 'number_of_pages': 10, 'author_id': 100},
+        {'title': 'Batch 4', 'isbn': 123, 'number_of_pages': 10, 'author_id': 1},
+        {'title': 'Batch 5', 'isbn': 9780000000105, 'number_of_pages': 10, 'author_id': 2}
+    ]
+    response = client.post('api/v1/books:batch', json=books, headers={
+        'Authorization': f'Bearer {token}'
+    })
+    response_data = response.get_json()
+    assert response.status_code == 207
+    assert response_data['success'] is False
+    assert response_data['number_of_records'] == 2
+    assert response_data['number_of_errors'] == 3
+    assert [item['success'] for item in response_data['data']] == [True, False, False, False, True]
+    assert 'isbn' in response_data['data'][1]['message']
+    assert 'author_id' in response_data['data'][2]['message']
+    assert 'isbn' in response_data['data'][3]['message']
+
+    book_id = response_data['data'][4]['data']['id']
+    response = client.get(f'api/v1/books/{book_id}')
+    assert response.status_code == 200
+    assert response.get_json()['data']['title'] == 'Batch 5'
+    assert client.get('api/v1/books').get_json()['pagination']['total_records'] == 16
+
+
+def test_create_books_batch_invalid_body(client, token):
+    response = client.post('api/v1/books:batch', json={'title': 'Batch'}, headers={
+        'Authorization': f'Bearer {token}'
+    })
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_update_books_batch(client, token, sample_data):
+    books = [
+        {'id': 1, 'title': 'Updated 1', 'isbn': 9780000000201, 'number_of_pages': 10},
+        {'id': 2, 'title': 'Updated 2', 'isbn': 9780000000201, 'number_of_pages': 10},
+        {'id': 300, 'title': 'Updated 3', 'isbn': 9780000000203, 'number_of_pages': 10}
+    ]
+    response = client.put('api/v1/books:batch', json=books, headers={
+        'Authorization': f'Bearer {token}'
+    })
+    response_data = response.get_json()
+    assert response.status_code == 207
+    assert [item['success'] for item in response_data['data']] == [True, False, False]
+    assert client.get('api/v1/books/1').get_json()['data']['title'] == 'Updated 1'
+
+
+def test_delete_books_batch(client, token, sample_data):
+    response = client.delete('api/v1/books:batch', json={'ids': [1, 2, 100]}, headers={
+        'Authorization': f'Bearer {token}'
+    })
+    response_data = response.get_json()
+    assert response.status_code == 207
+    assert response_data['number_of_records'] == 2
+    assert client.get('api/v1/books/1').status_code == 404
+    assert client.get('api/v1/books').get_json()['pagination']['total_records'] == 12
+
+
+def test_export_books_ndjson(client, sample_data):
+    response = client.get('api/v1/books:export')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == 14
+    assert json.loads(lines[0])['id'] == 1
+
+
+def test_export_books_csv_with_filter(client, sample_data):
+    response = client.get('api/v1/books:export?format=csv&with_authors=true'
+                          '&number_of_pages[gt]=300&sort=-number_of_pages')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/csv')
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    pages = [int(row['number_of_pages']) for row in rows]
+    assert pages == sorted(pages, reverse=True)
+    assert all(page > 300 for page in pages)
+    assert all(row['author_last_name'] for row in rows)
+
+
+def test_export_books_invalid_format(client):
+    response = client.get('api/v1/books:export?format=xml')
+    assert response.status_code == 400
+
+
+def test_export_books_command(app, sample_data):
+    runner = app.test_cli_runner()
+    result = runner.invoke(export, ['--filter', 'author_id=1', '--with-authors'])
+    assert result.exit_code == 0
+    rows = [json.loads(line) for line in result.output.splitlines()]
+    assert len(rows) > 0
+    assert all(row['author_id'] == 1 for row in rows)
+
+
+def test_search_books(client, sample_data):
+    response = client.get('api/v1/books/search?q=Animal farm&fields=id,title')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['success'] is True
+    assert response_data['data'] == [{'id': 1, 'title': 'Animal Farm'}]
+    assert response_data['pagination']['total_records'] == 1
+
+
+def test_search_books_ranking_and_pagination(client, token, sample_data):
+    for title, isbn in (('Wish you were here', 9780000000301), ('Dragons', 9780000000302)):
+        client.post('api/v1/authors/1/books', json={
+            'title': title,
+            'isbn': isbn,
+            'number_of_pages': 100,
+            'description': 'Wish'
+        }, headers={'Authorization': f'Bearer {token}'})
+    response = client.get('api/v1/books/search?q=wish&limit=2')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['pagination']['total_records'] == 3
+    # title matches are ranked before description matches
+    assert {item['title'] for item in response_data['data']} == {'Last Wish', 'Wish you were here'}
+    response_data = client.get(response_data['pagination']['next_page']).get_json()
+    assert [item['title'] for item in response_data['data']] == ['Dragons']
+
+
+def test_search_books_missing_query(client):
+    response = client.get('api/v1/books/search')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def _get_books_count(client, author_id: int) -> int:
+    return client.get(f'api/v1/authors/{author_id}?fields=books_count').get_json()['data']['books_count']
+
+
+def test_books_count_follows_book_writes(client, token, sample_data):
+    headers = {'Authorization': f'Bearer {token}'}
+    assert _get_books_count(client, 1) == 2
+    response = client.post('api/v1/authors/1/books',
+                           json={'title': 'New book', 'isbn': 9780000000999, 'number_of_pages': 100},
+                           headers=headers)
+    book_id = response.get_json()['data']['id']
+    assert _get_books_count(client, 1) == 3
+
+    client.put(f'api/v1/books/{book_id}',
+               json={'title': 'New book', 'isbn': 9780000000999, 'number_of_pages': 100, 'author_id': 2},
+               headers=headers)
+    assert _get_books_count(client, 1) == 2
+    assert _get_books_count(client, 2) == client.get('api/v1/authors/2/books').get_json()['number_of_records']
+
+    books_count = _get_books_count(client, 2)
+    client.delete(f'api/v1/books/{book_id}', headers=headers)
+    assert _get_books_count(client, 2) == books_count - 1
+
+
+def test_books_count_follows_batch_writes(client, token, sample_data):
+    headers = {'Authorization': f'Bearer {token}'}
+    response = client.post('api/v1/books:batch', json=[
+        {'title': 'Batch 1', 'isbn': 9780000000101, 'number_of_pages': 10, 'author_id': 1},
+        {'title': 'Batch 2', 'isbn': 9780000000102, 'number_of_pages': 10, 'author_id': 1}
+    ], headers=headers)
+    book_ids = [item['data']['id'] for item in response.get_json()['data']]
+    assert _get_books_count(client, 1) == 4
+
+    client.put('api/v1/books:batch', json=[
+        {'id': book_ids[0], 'title': 'Batch 1', 'isbn': 9780000000101, 'number_of_pages': 10, 'author_id': 3},
+        {'id': book_ids[1], 'title': 'Batch 2', 'isbn': 9780000000102, 'number_of_pages': 20}
+    ], headers=headers)
+    assert _get_books_count(client, 1) == 3
+    assert _get_books_count(client, 3) == client.get('api/v1/authors/3/books').get_json()['number_of_records']
+
+    client.delete('api/v1/books:batch', json={'ids': book_ids}, headers=headers)
+    assert _get_books_count(client, 1) == 2
+    assert _get_books_count(client, 3) == client.get('api/v1/authors/3/books').get_json()['number_of_records']
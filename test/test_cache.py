@@ -0,0 +1,39 @@
+from book_library_api import db
+from book_library_api.cache import LRUCacheBackend
+from book_library_api.models import Book, TableVersion
+
+
+def test_lru_cache_backend_evicts_least_recently_used():
+    backend = LRUCacheBackend(max_size=2)
+    backend.set('a', (b'a', 200, []), 60)
+    backend.set('b', (b'b', 200, []), 60)
+    assert backend.get('a') is not None
+    backend.set('c', (b'c', 200, []), 60)
+    assert backend.get('b') is None
+    assert backend.get('a') is not None
+    assert backend.get('c') is not None
+    assert backend.evictions == 1
+    assert len(backend) == 2
+
+
+def test_lru_cache_backend_expired_entry():
+    backend = LRUCacheBackend()
+    backend.set('a', (b'a', 200, []), -1)
+    assert backend.get('a') is None
+    assert backend.evictions == 1
+    assert len(backend) == 0
+
+
+def test_cached_response_not_served_after_write_in_other_process(app, client, sample_data):
+    response = client.get('api/v1/books/1')
+    etag = response.headers['ETag']
+    # write made by another worker - the table versions change, but the local cache is not invalidated
+    with app.app_context():
+        db.session.query(Book).filter(Book.id == 1).update({'title': 'Changed'})
+        TableVersion.bump(db.session.connection(), {Book.__tablename__})
+        db.session.commit()
+
+    response = client.get('api/v1/books/1')
+    assert response.get_json()['data']['title'] == 'Changed'
+    assert response.headers['ETag'] != etag
+    assert client.get('api/v1/books/1', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
@@ -0,0 +1,125 @@
+import json
+
+from book_library_api.models import Author, Book
+from book_library_api.commands.db_manage_commands import import_data, remove_data
+from book_library_api.importer import _write_copy_rows
+
+
+def test_add_data(app, sample_data):
+    with app.app_context():
+        assert Author.query.count() == 10
+        assert Book.query.count() == 14
+
+
+def test_remove_data(app, client, sample_data):
+    etag = client.get('api/v1/books').headers['ETag']
+    result = app.test_cli_runner().invoke(remove_data)
+    assert 'Data was removed from database' in result.output
+    with app.app_context():
+        assert Author.query.count() == 0
+        assert Book.query.count() == 0
+    response = client.get('api/v1/books', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['data'] == []
+
+
+def test_import_books_ndjson_with_rejects(app, sample_data, tmp_path):
+    file_path = tmp_path / 'books.ndjson'
+    rejects_path = tmp_path / 'rejects.ndjson'
+    records = [{'title': f'Imported {i}', 'isbn': 9781000000000 + i, 'number_of_pages': 100, 'author_id': 1}
+               for i in range(25)]
+    records[3]['author_id'] = 100
+    records[7]['isbn'] = 9780141036137  # already in sample data
+    file_path.write_text('\n'.join(json.dumps(record) for record in records) + '\nnot json\n')
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(import_data, [str(file_path), '--model', 'books', '--batch-size', '10',
+                                         '--rejects', str(rejects_path)])
+    assert result.exit_code == 0
+    assert '23 imported, 3 rejected' in result.output
+    rejected = [json.loads(line) for line in rejects_path.read_text().splitlines()]
+    assert [item['record_number'] for item in rejected] == [4, 8, 26]
+    assert not (tmp_path / 'books.ndjson.checkpoint').exists()
+    with app.app_context():
+        assert Book.query.count() == 14 + 23
+
+
+def test_import_authors_csv_resume(app, tmp_path):
+    file_path = tmp_path / 'authors.csv'
+    lines = ['first_name,last_name,birth_date'] + [f'Name{i},Last{i},01-01-1900' for i in range(12)]
+    file_path.write_text('\n'.join(lines) + '\n')
+    (tmp_path / 'authors.csv.checkpoint').write_text(json.dumps({'processed': 5}))
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(import_data, [str(file_path), '--model', 'authors', '--resume'])
+    assert result.exit_code == 0
+    with app.app_context():
+        assert [author.first_name for author in Author.query.order_by(Author.id)] == \
+               [f'Name{i}' for i in range(5, 12)]
+
+
+def test_import_books_json_array(app, sample_data, tmp_path):
+    file_path = tmp_path / 'books.json'
+    records = [{'title': 'x' * 40, 'isbn': 9782000000000 + i, 'number_of_pages': 1, 'author_id': 2,
+                'description': 'y' * 5000} for i in range(100)]
+    file_path.write_text(json.dumps(records, indent=2))
+    with app.app_context():
+        books_count = Book.query.count()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(import_data, [str(file_path), '--model', 'books'])
+    assert result.exit_code == 0
+    with app.app_context():
+        assert Book.query.count() == books_count + 100
+
+
+def test_import_books_json_malformed_record(app, sample_data, tmp_path):
+    file_path = tmp_path / 'books.json'
+    rejects_path = tmp_path / 'rejects.ndjson'
+    records = [json.dumps({'title': f'Imported {i}', 'isbn': 9783000000000 + i, 'number_of_pages': 1,
+                           'author_id': 2}) for i in range(3)]
+    file_path.write_text('[' + ', '.join(records[:2] + ['{"title": broken, "tags": ["a", "]"]}'] + records[2:]) + ']')
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(import_data, [str(file_path), '--model', 'books', '--rejects', str(rejects_path)])
+    assert result.exit_code == 0
+    assert '3 imported, 1 rejected' in result.output
+    rejected = json.loads(rejects_path.read_text())
+    assert rejected['record_number'] == 3
+    assert rejected['record'] == '{"title": broken, "tags": ["a", "]"]}'
+
+
+def test_import_books_json_truncated_file(app, sample_data, tmp_path):
+    file_path = tmp_path / 'books.json'
+    file_path.write_text('[{"title": "Imported", "isbn": 9783000000000, "number_of_pages": 1, "author_id": 2}, '
+                         '{"title": "Trunc')
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(import_data, [str(file_path), '--model', 'books'])
+    assert result.exit_code == 1
+    assert 'record 2: unexpected end of JSON file' in result.output
+    assert isinstance(result.exception, SystemExit)
+
+
+def test_import_books_with_optional_fields_in_some_rows(app, sample_data, tmp_path):
+    file_path = tmp_path / 'books.ndjson'
+    records = [
+        {'title': 'No description', 'isbn': 9783000000001, 'number_of_pages': 1, 'author_id': 1},
+        {'title': 'Description', 'isbn': 9783000000002, 'number_of_pages': 1, 'author_id': 1, 'description': 'abc'},
+        {'title': 'No description', 'isbn': 9783000000003, 'number_of_pages': 1, 'author_id': 1}
+    ]
+    file_path.write_text('\n'.join(json.dumps(record) for record in records) + '\n')
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(import_data, [str(file_path), '--model', 'books'])
+    assert result.exit_code == 0
+    assert '3 imported, 0 rejected' in result.output
+    with app.app_context():
+        descriptions = [book.description for book in Book.query.filter(Book.isbn >= 9783000000000).order_by(Book.isbn)]
+    assert descriptions == [None, 'abc', None]
+
+
+def test_write_copy_rows_keeps_null_and_empty_string_apart():
+    buffer = _write_copy_rows([{'title': 'a', 'description': None}, {'title': 'b', 'description': ''}],
+                              ['title', 'description'])
+    assert buffer.read().splitlines() == ['a,\\N', 'b,']
@@ -0,0 +1,12 @@
+import sqlite3
+from sqlalchemy.exc import IntegrityError
+
+from book_library_api.errors.errors import integrity_error
+
+
+def test_integrity_error_with_list_body(app):
+    error = IntegrityError('INSERT INTO book', {}, sqlite3.IntegrityError('UNIQUE constraint failed: book.isbn'))
+    with app.test_request_context('/api/v1/books:batch', method='POST', json=[{'isbn': 9780000000001}]):
+        response = integrity_error(error)
+    assert response.status_code == 409
+    assert response.get_json()['message'] == 'Isbn already exists!'
@@ -0,0 +1,14 @@
+import json
+from datetime import date
+from flask.json import JSONEncoder
+
+from book_library_api.json_provider import OrjsonEncoder
+
+
+def test_orjson_encoder_matches_json_module(app):
+    assert app.json_encoder is OrjsonEncoder
+    data = {'title': 'Pan Tadeusz', 'pages': [1, 2.5, None], 'author': 'Żeromski', 'published': date(1834, 6, 28)}
+    for indent in (None, 2, 4):
+        encoded = OrjsonEncoder(sort_keys=True, indent=indent).encode(data)
+        assert json.loads(encoded) == json.loads(JSONEncoder(sort_keys=True, indent=indent).encode(data))
+    assert list(json.loads(OrjsonEncoder(sort_keys=True).encode(data))) == sorted(data)
@@ -0,0 +1,44 @@
+from book_library_api.ratelimit import MemoryRateLimitBackend, parse_limit
+
+
+def test_parse_limit():
+    assert parse_limit('10/minute') == (10, 10 / 60)
+    assert parse_limit('5/second') == (5, 5)
+
+
+def test_memory_backend_token_bucket():
+    backend = MemoryRateLimitBackend()
+    assert backend.consume('key', capacity=2, rate=1) == 0
+    assert backend.consume('key', capacity=2, rate=1) == 0
+    wait = backend.consume('key', capacity=2, rate=1)
+    assert 0 < wait <= 1
+    assert backend.consume('other', capacity=2, rate=1) == 0
+
+
+def test_login_rate_limited(app, client, user):
+    app.config['RATELIMIT_LIMITS'] = {'auth.login': '2/minute'}
+    credentials = {'username': user['username'], 'password': user['password']}
+    assert client.post('/api/v1/auth/login', json=credentials).status_code == 200
+    assert client.post('/api/v1/auth/login', json=credentials).status_code == 200
+    response = client.post('/api/v1/auth/login', json=credentials)
+    assert response.status_code == 429
+    assert response.get_json()['success'] is False
+    assert 0 < int(response.headers['Retry-After']) <= 30
+    # other endpoints use default limit
+    assert client.get('/api/v1/authors').status_code == 200
+
+
+def test_rate_limit_keyed_on_user(app, client, token):
+    app.config['RATELIMIT_DEFAULT'] = '1/minute'
+    headers = {'Authorization': f'Bearer {token}'}
+    assert client.get('/api/v1/auth/me', headers=headers).status_code == 200
+    assert client.get('/api/v1/auth/me', headers=headers).status_code == 429
+    # anonymous requests from the same address have own bucket
+    assert client.get('/api/v1/authors').status_code == 200
+
+
+def test_rate_limit_disabled(app, client):
+    app.config['RATELIMIT_DEFAULT'] = '1/minute'
+    app.config['RATELIMIT_ENABLED'] = False
+    assert client.get('/api/v1/authors').status_code == 200
+    assert client.get('/api/v1/authors').status_code == 200
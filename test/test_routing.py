@@ -0,0 +1,56 @@
+import pytest
+from datetime import date
+from flask import g
+from sqlalchemy import create_engine
+
+from book_library_api import db, replica_router
+from book_library_api.models import Author
+
+
+@pytest.fixture()
+def replica_uri(app, tmp_path):
+    uri = f'sqlite:///{tmp_path / "replica.db"}'
+    engine = create_engine(uri)
+    db.Model.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(Author.__table__.insert(), {
+            'first_name': 'Replica', 'last_name': 'Author', 'birth_date': date(1900, 1, 1)
+        })
+    engine.dispose()
+    app.config['SQLALCHEMY_REPLICA_URIS'] = [uri]
+    replica_router.init_app(app)
+    return uri
+
+
+def test_read_only_view_uses_replica(client, replica_uri):
+    response = client.get('/api/v1/authors')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert [item['first_name'] for item in response_data['data']] == ['Replica']
+
+
+def test_write_view_uses_primary(app, client, token, author, replica_uri):
+    response = client.post('/api/v1/authors', json=author, headers={
+        'Authorization': f'Bearer {token}'
+    })
+    assert response.status_code == 201
+    with app.app_context():
+        assert [item.first_name for item in Author.query.all()] == ['Adam']
+
+
+def test_read_after_write_uses_primary(app, replica_uri):
+    with app.test_request_context():
+        g.read_only = True
+        db.session.add(Author(first_name='Adam', last_name='Mickiewicz', birth_date=date(1798, 12, 24)))
+        db.session.flush()
+        assert [item.first_name for item in Author.query.all()] == ['Adam']
+        db.session.rollback()
+
+
+def test_unavailable_replica_falls_back_to_primary(app, client, sample_data, tmp_path):
+    app.config['SQLALCHEMY_REPLICA_URIS'] = [f'sqlite:///{tmp_path / "missing" / "replica.db"}']
+    replica_router.init_app(app)
+    response = client.get('/api/v1/authors')
+    assert response.status_code == 200
+    assert response.get_json()['number_of_records'] > 0
+    assert app.extensions['replica_router']['unavailable_until']
@@ -0,0 +1,99 @@
+def test_get_books_stats(client, sample_data):
+    response = client.get('api/v1/stats/books')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/json'
+    assert response_data['success'] is True
+    assert response_data['data'] == {
+        'count': 14,
+        'min_number_of_pages': 32,
+        'max_number_of_pages': 1392,
+        'avg_number_of_pages': 418.64
+    }
+
+
+def test_get_books_stats_with_filter(client, sample_data):
+    response = client.get('api/v1/stats/books?author_id=1')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['data'] == {
+        'count': 2,
+        'min_number_of_pages': 112,
+        'max_number_of_pages': 325,
+        'avg_number_of_pages': 218.5
+    }
+
+
+def test_get_books_stats_no_records(client):
+    response = client.get('api/v1/stats/books')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['data'] == {
+        'count': 0,
+        'min_number_of_pages': None,
+        'max_number_of_pages': None,
+        'avg_number_of_pages': None
+    }
+
+
+def test_get_books_stats_invalidated_on_write(client, token, sample_data):
+    response = client.get('api/v1/stats/books')
+    assert response.get_json()['data']['count'] == 14
+    client.post('api/v1/authors/1/books',
+                json={'title': 'New book', 'isbn': 9780000000999, 'number_of_pages': 2000},
+                headers={'Authorization': f'Bearer {token}'})
+    response = client.get('api/v1/stats/books')
+    response_data = response.get_json()
+    assert response_data['data']['count'] == 15
+    assert response_data['data']['max_number_of_pages'] == 2000
+
+
+def test_get_authors_stats(client, sample_data):
+    response = client.get('api/v1/stats/authors?limit=2')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['number_of_records'] == 2
+    assert response_data['data'][0] == {
+        'id': 6,
+        'first_name': 'Suzanne',
+        'last_name': 'Collins',
+        'books_count': 3,
+        'min_number_of_pages': 448,
+        'max_number_of_pages': 464,
+        'avg_number_of_pages': 453.33
+    }
+    assert response_data['data'][1]['id'] == 1
+    assert response_data['data'][1]['books_count'] == 2
+
+
+def test_get_authors_stats_with_filter(client, sample_data):
+    response = client.get('api/v1/stats/authors?number_of_pages[gte]=1000')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['number_of_records'] == 1
+    assert response_data['data'][0]['books_count'] == 1
+    assert response_data['data'][0]['max_number_of_pages'] == 1392
+
+
+def test_get_authors_decades_stats(client, sample_data):
+    response = client.get('api/v1/stats/authors/decades')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['data'][0] == {'decade': 1890, 'authors_count': 1, 'books_count': 1}
+    assert response_data['data'][-1] == {'decade': 1960, 'authors_count': 4, 'books_count': 7}
+    assert sum(item['books_count'] for item in response_data['data']) == 14
+
+
+def test_get_books_facets(client, sample_data):
+    response = client.get('api/v1/stats/books/facets?number_of_pages[gt]=300')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert response_data['data']['author'][0] == {'id': 6, 'first_name': 'Suzanne', 'last_name': 'Collins',
+                                                  'count': 3}
+    assert sum(item['count'] for item in response_data['data']['author']) == 9
+    assert response_data['data']['number_of_pages'] == [
+        {'range': '300-499', 'count': 6},
+        {'range': '500-999', 'count': 2},
+        {'range': '1000+', 'count': 1}
+    ]
+
@@ -0,0 +1,44 @@
+from datetime import date
+
+from book_library_api.models import Author, Book, BooksSchema
+from book_library_api.utils import get_schema, apply_filter, get_query_columns, fill_missing_keys
+
+
+def test_get_schema_is_cached():
+    schema = get_schema(BooksSchema, many=True, only=['title', 'id'])
+    assert get_schema(BooksSchema, many=True, only=['id', 'title']) is schema
+    assert get_schema(BooksSchema, many=True) is not schema
+    assert schema.only == {'id', 'title'}
+
+
+def test_get_query_columns_whitelist():
+    columns = get_query_columns(Author)
+    assert set(columns) == {'id', 'first_name', 'last_name', 'birth_date', 'books_count'}
+    assert get_query_columns(Author) is columns
+
+
+def test_apply_filter_coerces_values(app):
+    with app.app_context():
+        query = apply_filter(Author, Author.query, {
+            'birth_date[gte]': '01-01-1900',
+            'books_count': '2',
+            'id[lt]': 'abc',
+            'books': '1',
+            'query': 'x'
+        })
+        compiled = query.statement.compile()
+    assert set(compiled.params.values()) == {date(1900, 1, 1), 2}
+
+
+def test_apply_filter_same_statement_for_any_params_order(app):
+    with app.app_context():
+        first = apply_filter(Book, Book.query, {'title': 'Dune', 'number_of_pages[gt]': '100'})
+        second = apply_filter(Book, Book.query, {'number_of_pages[gt]': '100', 'title': 'Dune'})
+        assert str(first.statement) == str(second.statement)
+
+
+def test_fill_missing_keys():
+    rows = [{'title': 'a'}, {'title': 'b', 'description': 'c'}]
+    assert fill_missing_keys(rows) == [{'title': 'a', 'description': None}, {'title': 'b', 'description': 'c'}]
+    # rows are dumped in batch response, where missing fields stay missing
+    assert rows[0] == {'title': 'a'}